@@ -1,7 +1,7 @@
 import asyncio
 import json
 import random
-import uuid
+import secrets
 from typing import TYPE_CHECKING, Tuple, Union
 
 import pydantic
@@ -393,8 +393,7 @@ class AssistantMixin:
         try:
             if not save_name:
                 # build a save name
-                uuid_str = str(uuid.uuid4())[:8]
-                save_name = f"{uuid_str}-forked"
+                save_name = f"{secrets.token_hex(4)}-forked"
             
             log.info(f"Forking scene", message_id=message_id, save_name=save_name)
             
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-import random
+import asyncio
+from collections import defaultdict
 from typing import TYPE_CHECKING, List
 
 import structlog
@@ -10,6 +11,7 @@ import talemate.instance as instance
 from talemate.agents.conversation import ConversationAgentEmission
 from talemate.emit import emit
 from talemate.events import GameLoopActorIterEvent, SceneStateEvent
+from talemate.exceptions import TalemateInterrupt
 from talemate.game.engine import GameInstructionsMixin
 from talemate.prompts import Prompt
 from talemate.scene_message import DirectorMessage
@@ -27,6 +29,11 @@ if TYPE_CHECKING:
 
 log = structlog.get_logger("talemate.agent.director")
 
+STOPPING_STRINGS = ["#"]
+
+# max number of characters persisted at the same time
+PERSIST_CHARACTERS_CONCURRENCY = 3
+
 
 @register()
 class DirectorAgent(
@@ -43,8 +50,9 @@ class DirectorAgent(
     def __init__(self, client, **kwargs):
         self.is_enabled = True
         self.client = client
-        self.next_direct_character = {}
+        self.next_direct_character = defaultdict(int)
         self.next_direct_scene = 0
+        self._character_stopping_strings = ((), [])
         self.actions = {
             "direct": AgentAction(
                 enabled=True,
@@ -158,7 +166,7 @@ class DirectorAgent(
         await self.run_gamestate_instructions()
 
     async def on_conversation_before_generate(self, event: ConversationAgentEmission):
-        log.info("on_conversation_before_generate", director_enabled=self.enabled)
+        log.debug("on_conversation_before_generate", director_enabled=self.enabled)
         if not self.enabled:
             return
 
@@ -185,12 +193,16 @@ class DirectorAgent(
         event.game_loop.had_passive_narration = await self.direct(None)
 
     async def direct(self, character: Character) -> bool:
-        if not self.actions["direct"].enabled:
+        direct_action = self.actions["direct"]
+
+        if not direct_action.enabled:
             return False
 
+        config = direct_action.config
+
         if character:
-            if not self.actions["direct"].config["direct_actors"].value:
-                log.info(
+            if not config["direct_actors"].value:
+                log.debug(
                     "direct",
                     skip=True,
                     reason="direct_actors disabled",
@@ -202,16 +214,16 @@ class DirectorAgent(
             # defined
             character_goals = character.get_detail("goals")
             if not character_goals:
-                log.info("direct", skip=True, reason="no goals", character=character)
+                log.debug("direct", skip=True, reason="no goals", character=character)
                 return False
 
-            next_direct = self.next_direct_character.get(character.name, 0)
+            next_direct = self.next_direct_character[character.name]
 
             if (
-                next_direct % self.actions["direct"].config["turns"].value != 0
+                next_direct % config["turns"].value != 0
                 or next_direct == 0
             ):
-                log.info(
+                log.debug(
                     "direct", skip=True, next_direct=next_direct, character=character
                 )
                 self.next_direct_character[character.name] = next_direct + 1
@@ -221,25 +233,25 @@ class DirectorAgent(
             await self.direct_scene(character, character_goals)
             return True
         else:
-            if not self.actions["direct"].config["direct_scene"].value:
-                log.info("direct", skip=True, reason="direct_scene disabled")
+            if not config["direct_scene"].value:
+                log.debug("direct", skip=True, reason="direct_scene disabled")
                 return False
 
             # no character, see if there are NPC characters at all
             # if not we always want to direct narration
             always_direct = (
-                not self.scene.npc_character_names
+                not self.scene.has_active_npcs
                 or self.scene.game_state.ops.always_direct
             )
 
             next_direct = self.next_direct_scene
 
             if (
-                next_direct % self.actions["direct"].config["turns"].value != 0
+                next_direct % config["turns"].value != 0
                 or next_direct == 0
             ):
                 if not always_direct:
-                    log.info("direct", skip=True, next_direct=next_direct)
+                    log.debug("direct", skip=True, next_direct=next_direct)
                     self.next_direct_scene += 1
                     return False
 
@@ -290,8 +302,9 @@ class DirectorAgent(
                 },
             )
 
-            if "#" in response:
-                response = response.split("#")[0]
+            idx = response.find("#")
+            if idx != -1:
+                response = response[:idx]
 
             log.info(
                 "direct_character",
@@ -300,7 +313,7 @@ class DirectorAgent(
                 response=response,
             )
 
-            response = response.strip().split("\n")[0].strip()
+            response = response.strip().partition("\n")[0].strip()
             # response += f" (current story goal: {prompt})"
             message = DirectorMessage(response, source=character.name)
             emit("director", message, character=character)
@@ -312,19 +325,37 @@ class DirectorAgent(
     async def persist_characters_from_worldstate(
         self, exclude: list[str] = None
     ) -> List[Character]:
-        created_characters = []
-
-        for character_name in self.scene.world_state.characters.keys():
+        character_names = self.scene.character_names
+        names = [
+            character_name
+            for character_name in self.scene.world_state.characters.keys()
+            if not (exclude and character_name.lower() in exclude)
+            and character_name not in character_names
+        ]
+
+        # characters are generated concurrently, limited to avoid
+        # flooding the client with requests
+        semaphore = asyncio.Semaphore(PERSIST_CHARACTERS_CONCURRENCY)
+
+        async def _persist_character(name: str) -> Character:
+            async with semaphore:
+                return await self.persist_character(name=name)
+
+        results = await asyncio.gather(
+            *[_persist_character(name) for name in names], return_exceptions=True
+        )
 
-            if exclude and character_name.lower() in exclude:
-                continue
+        created_characters = []
 
-            if character_name in self.scene.character_names:
+        for name, result in zip(names, results):
+            if isinstance(result, TalemateInterrupt):
+                raise result
+            if isinstance(result, BaseException):
+                log.error(
+                    "persist_characters_from_worldstate", name=name, error=result
+                )
                 continue
-
-            character = await self.persist_character(name=character_name)
-
-            created_characters.append(character)
+            created_characters.append(result)
 
         self.scene.emit_status()
 
@@ -348,20 +379,7 @@ class DirectorAgent(
             self.scene.log.debug("persist_character", adjusted_name=name)
 
         character = self.scene.Character(name=name)
-        character.color = random.choice(
-            [
-                "#F08080",
-                "#FFD700",
-                "#90EE90",
-                "#ADD8E6",
-                "#DDA0DD",
-                "#FFB6C1",
-                "#FAFAD2",
-                "#D3D3D3",
-                "#B0E0E6",
-                "#FFDEAD",
-            ]
-        )
+        character.set_color()
 
         if not attributes:
             attributes = await world_state.extract_character_sheet(
@@ -426,6 +444,23 @@ class DirectorAgent(
         self.scene.push_history(message)
         emit("director", message)
 
+    @property
+    def character_stopping_strings(self) -> list[str]:
+        """
+        Returns the name prefix stopping strings for all characters in the scene
+
+        Re-built only when the character names change (actors added, removed
+        or renamed).
+        """
+        names = tuple(c.name for c in self.scene.get_characters())
+        cached_names, stopping_strings = self._character_stopping_strings
+
+        if names != cached_names:
+            stopping_strings = [f"\n{name}:" for name in names]
+            self._character_stopping_strings = (names, stopping_strings)
+
+        return stopping_strings
+
     def inject_prompt_paramters(
         self, prompt_param: dict, kind: str, agent_function_name: str
     ):
@@ -435,10 +470,9 @@ class DirectorAgent(
             kind=kind,
             agent_function_name=agent_function_name,
         )
-        character_names = [f"\n{c.name}:" for c in self.scene.get_characters()]
         if prompt_param.get("extra_stopping_strings") is None:
             prompt_param["extra_stopping_strings"] = []
-        prompt_param["extra_stopping_strings"] += character_names + ["#"]
+        prompt_param["extra_stopping_strings"] += self.character_stopping_strings + STOPPING_STRINGS
         if agent_function_name == "update_content_context":
             prompt_param["extra_stopping_strings"] += ["\n"]
 
@@ -3,8 +3,9 @@ from __future__ import annotations
 import asyncio
 import functools
 import hashlib
+import itertools
 import uuid
-from typing import Callable
+from typing import Callable, Iterable
 
 import structlog
 from chromadb.config import Settings
@@ -43,6 +44,12 @@ if not chromadb:
 
 from talemate.agents.registry import register
 
+# max number of memory queries run at the same time by multi_query
+MULTI_QUERY_CONCURRENCY = 4
+
+# number of objects handed to add_many at a time by add_many_iter
+ADD_MANY_BATCH_SIZE = 256
+
 class MemoryDocument(str):
     def __new__(cls, text, meta, id, raw):
         inst = super().__new__(cls, text)
@@ -328,6 +335,17 @@ class MemoryAgent(Agent):
         """
         raise NotImplementedError()
 
+    async def add_many_iter(
+        self, objects: Iterable[dict], batch_size: int = ADD_MANY_BATCH_SIZE
+    ):
+        """
+        Add objects from an iterable in batches of `batch_size` so the
+        full list never has to be built up front
+        """
+        objects = iter(objects)
+        while batch := list(itertools.islice(objects, batch_size)):
+            await self.add_many(batch)
+
     @set_processing
     async def delete(self, meta: dict):
         """
@@ -349,6 +367,31 @@ class MemoryAgent(Agent):
         """
         raise NotImplementedError()
 
+    @set_processing
+    async def upsert_many(self, objects: list[dict], delete_meta: dict | None = None):
+        """
+        Delete objects matching `delete_meta` (if given) and add `objects`
+        in a single executor round-trip
+        """
+        if self.readonly:
+            log.debug("memory agent", status="readonly")
+            return
+
+        while not self._ready_to_add:
+            await asyncio.sleep(0.1)
+
+        log.debug(
+            "memory agent upsert many", len=len(objects), delete_meta=delete_meta
+        )
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._upsert_many, objects, delete_meta)
+
+    def _upsert_many(self, objects: list[dict], delete_meta: dict | None = None):
+        if delete_meta:
+            self._delete(delete_meta)
+        self._add_many(objects)
+
     @set_processing
     async def get(self, text, character=None, **query):
         with MemoryRequest(query=text, query_params=query) as active_memory_request:
@@ -441,15 +484,24 @@ class MemoryAgent(Agent):
     ):
         """
         Get the character memory context for a given character
+
+        The queries are sent concurrently (bounded by MULTI_QUERY_CONCURRENCY)
+        and their results merged in query order.
         """
 
-        memory_context = []
-        for query in queries:
-            if not query:
-                continue
+        queries = [query for query in queries if query]
+        semaphore = asyncio.Semaphore(MULTI_QUERY_CONCURRENCY)
 
+        async def _get(query: str):
+            async with semaphore:
+                return await self.get(formatter(query), limit=limit, **where)
+
+        results = await asyncio.gather(*[_get(query) for query in queries])
+
+        memory_context = []
+        for memories in results:
             i = 0
-            for memory in await self.get(formatter(query), limit=limit, **where):
+            for memory in memories:
                 if memory in memory_context:
                     continue
 
@@ -1,3 +1,5 @@
+import asyncio
+from collections import OrderedDict
 from typing import TYPE_CHECKING
 import structlog
 from talemate.agents.base import (
@@ -14,6 +16,12 @@ __all__ = ["MemoryRAGMixin"]
 
 log = structlog.get_logger()
 
+# max number of (options, fingerprint) entries kept in the scene rag cache
+RAG_CACHE_MAX_ENTRIES = 64
+
+# max number of context history results kept for rag prompts
+RAG_CONTEXT_HISTORY_MAX_ENTRIES = 4
+
 class MemoryRAGMixin:
     
     @classmethod
@@ -100,46 +108,96 @@ class MemoryRAGMixin:
         return self.actions["use_long_term_memory"].config["cache"].value
     
     @property
-    def long_term_memory_cache_key(self):
+    def long_term_memory_cache_key(self) -> tuple:
         """
         Build the key from the various options
         """
         
-        parts = [
-            self.long_term_memory_retrieval_method,
-            self.long_term_memory_number_of_queries,
-            self.long_term_memory_answer_length
-        ]
+        config = self.actions["use_long_term_memory"].config
         
-        return "-".join(map(str, parts))
+        return (
+            config["retrieval_method"].value,
+            config["number_of_queries"].value,
+            config["answer_length"].value,
+        )
     
     
     def connect(self, scene):
         super().connect(scene)
         
         # new scene, reset cache
-        scene.rag_cache = {}
+        scene.rag_cache = OrderedDict()
+        scene.rag_inflight = {}
+        scene.rag_context_history_cache = OrderedDict()
     
     # methods
     
+    def rag_cache_fingerprint(self) -> str | int:
+        return self.scene.history[-1].fingerprint if self.scene.history else 0
+    
+    def rag_context_history(self, budget: int) -> list[str]:
+        """
+        Returns `scene.context_history` for the rag prompt, re-using the
+        previous result as long as the scene history has not changed
+        
+        Edits to earlier messages and layered history rebuilds are picked
+        up through `scene.history_revision`, layers growing or being
+        truncated through their lengths.
+        """
+        scene = self.scene
+        cache = scene.rag_context_history_cache
+        key = (
+            self.rag_cache_fingerprint(),
+            scene.history_revision,
+            len(scene.history),
+            len(scene.archived_history),
+            tuple(len(layer) for layer in scene.layered_history),
+            scene.ts,
+            budget,
+        )
+        
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        
+        history = scene.context_history(keep_director=False, budget=budget)
+        cache[key] = history
+        
+        while len(cache) > RAG_CONTEXT_HISTORY_MAX_ENTRIES:
+            cache.popitem(last=False)
+        
+        return history
+    
     async def rag_set_cache(self, content:list[str]):
-        self.scene.rag_cache[self.long_term_memory_cache_key] = {
-            "content": content,
-            "fingerprint": self.scene.history[-1].fingerprint if self.scene.history else 0 
-        }
+        """
+        Stores the content in the scene rag cache
+        
+        Multiple fingerprints are kept per option set so that returning to an
+        earlier state of the scene (e.g., regenerating or deleting the last
+        message) can re-use the previous result. The least recently used
+        entry is dropped once RAG_CACHE_MAX_ENTRIES is exceeded.
+        """
+        cache = self.scene.rag_cache
+        key = (self.long_term_memory_cache_key, self.rag_cache_fingerprint())
+        cache[key] = content
+        cache.move_to_end(key)
+        
+        while len(cache) > RAG_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
         
     async def rag_get_cache(self) -> list[str] | None:
         
         if not self.long_term_memory_cache:
             return None
         
-        fingerprint = self.scene.history[-1].fingerprint if self.scene.history else 0
-        cache = self.scene.rag_cache.get(self.long_term_memory_cache_key)
+        cache = self.scene.rag_cache
+        key = (self.long_term_memory_cache_key, self.rag_cache_fingerprint())
+        content = cache.get(key)
         
-        if cache and cache["fingerprint"] == fingerprint:
-            return cache["content"]
+        if content is not None:
+            cache.move_to_end(key)
         
-        return None
+        return content
             
     async def rag_build(
         self, 
@@ -149,19 +207,54 @@ class MemoryRAGMixin:
     ) -> list[str]:
         """
         Builds long term memory to be inserted into a prompt
+        
+        When caching is enabled, concurrent calls that share a cache key
+        await the same in-flight retrieval instead of starting their own.
         """
 
         if not self.long_term_memory_enabled:
             return []
         
         cached = await self.rag_get_cache()
+        cache_key = self.long_term_memory_cache_key
         
         if cached:
-            log.debug(f"Using cached long term memory", agent=self.agent_type, key=self.long_term_memory_cache_key)
+            log.debug(f"Using cached long term memory", agent=self.agent_type, key=cache_key)
             return cached
+        
+        if not self.long_term_memory_cache:
+            return await self._rag_build(character, prompt, sub_instruction)
+        
+        key = (cache_key, self.rag_cache_fingerprint())
+        task = self.scene.rag_inflight.get(key)
+        
+        if task:
+            log.debug(f"Awaiting in-flight long term memory", agent=self.agent_type, key=cache_key)
+            return await asyncio.shield(task)
+        
+        task = asyncio.ensure_future(self._rag_build(character, prompt, sub_instruction))
+        self.scene.rag_inflight[key] = task
+        
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self.scene.rag_inflight.get(key) is task:
+                del self.scene.rag_inflight[key]
+    
+    async def _rag_build(
+        self, 
+        character: "Character" = None, 
+        prompt: str = "",
+        sub_instruction: str = "",
+    ) -> list[str]:
+        """
+        Runs the long term memory retrieval and stores the result in the cache
+        """
 
         memory_context = ""
         retrieval_method = self.long_term_memory_retrieval_method
+        answer_length = self.long_term_memory_answer_length
+        number_of_queries = self.long_term_memory_number_of_queries
         
         if not sub_instruction:
             if character:
@@ -173,8 +266,7 @@ class MemoryRAGMixin:
             world_state = instance.get_agent("world_state")
             
             if not prompt:
-                prompt = self.scene.context_history(
-                    keep_director=False,
+                prompt = self.rag_context_history(
                     budget=int(self.client.max_token_length * 0.75),
                 )
                 
@@ -192,8 +284,8 @@ class MemoryRAGMixin:
                     await world_state.analyze_text_and_extract_context(
                         prompt, sub_instruction,
                         include_character_context=True,
-                        response_length=self.long_term_memory_answer_length,
-                        num_queries=self.long_term_memory_number_of_queries
+                        response_length=answer_length,
+                        num_queries=number_of_queries
                     )
                 ).split("\n")
             elif retrieval_method == "queries":
@@ -201,22 +293,26 @@ class MemoryRAGMixin:
                     await world_state.analyze_text_and_extract_context_via_queries(
                         prompt, sub_instruction,
                         include_character_context=True,
-                        response_length=self.long_term_memory_answer_length,
-                        num_queries=self.long_term_memory_number_of_queries
+                        response_length=answer_length,
+                        num_queries=number_of_queries
                         
                     )
                 )
 
         else:
-            history = list(map(str, self.scene.collect_messages(max_iterations=3)))
+            history = [str(message) for message in self.scene.collect_messages(max_iterations=3)]
             log.debug(
                 "memory_rag_mixin.build_prompt_default_memory",
                 history=history,
                 direct=True,
             )
-            memory = instance.get_agent("memory")
-            context = await memory.multi_query(history, max_tokens=500, iterate=5)
-            memory_context = context
+            
+            if history:
+                memory = instance.get_agent("memory")
+                memory_context = await memory.multi_query(history, max_tokens=500, iterate=5)
+            else:
+                # nothing to query with
+                memory_context = []
 
         await self.rag_set_cache(memory_context)
 
@@ -456,6 +456,7 @@ class LayeredHistoryMixin:
             while await update_layers():
                 has_been_updated = True
             if has_been_updated:
+                self.scene.history_revision += 1
                 emit("status", status="success", message="Layered history updated.")
             
         except SummaryLongerThanOriginalError as exc:
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import functools
 import io
 import os
@@ -24,6 +23,7 @@ from talemate.emit import emit
 from talemate.emit.signals import handlers
 from talemate.events import GameLoopNewMessageEvent
 from talemate.scene_message import CharacterMessage, NarratorMessage
+from talemate.util.b64 import b64encode
 
 from .base import (
     Agent,
@@ -442,7 +442,7 @@ class TTSAgent(Agent):
                 return
 
         if isinstance(emission.message, CharacterMessage):
-            character_prefix = emission.message.split(":", 1)[0]
+            character_prefix = emission.message.character_name
         else:
             character_prefix = ""
 
@@ -532,7 +532,7 @@ class TTSAgent(Agent):
 
         emit(
             "audio_queue",
-            data={"audio_data": base64.b64encode(audio_data).decode("utf-8")},
+            data={"audio_data": b64encode(audio_data).decode("utf-8")},
         )
 
         self.playback_done_event.set()  # Signal that playback is finished
@@ -554,7 +554,7 @@ class TTSAgent(Agent):
 
         tts = self.tts_instance
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
 
         voice = self.voice(self.default_voice_id)
 
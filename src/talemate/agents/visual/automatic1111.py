@@ -1,9 +1,10 @@
-import base64
-import io
-
 import httpx
 import structlog
-from PIL import Image
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 from talemate.agents.base import (
     Agent,
@@ -58,6 +59,25 @@ SAMPLING_SCHEDULES = [
 
 SAMPLING_SCHEDULES = sorted(SAMPLING_SCHEDULES, key=lambda x: x["label"])
 
+
+class ResponseReader:
+    """
+    Async file-like wrapper around a streamed httpx response so it can
+    be consumed by ijson
+    """
+
+    def __init__(self, response: httpx.Response):
+        self.chunks = response.aiter_bytes()
+
+    async def read(self, size: int = -1) -> bytes:
+        # ijson probes the reader with read(0) to detect bytes vs str
+        if size == 0:
+            return b""
+        try:
+            return await anext(self.chunks)
+        except StopAsyncIteration:
+            return b""
+
 @register(backend_name="automatic1111", label="AUTOMATIC1111")
 class Automatic1111Mixin:
 
@@ -126,6 +146,20 @@ class Automatic1111Mixin:
         )
     }
 
+    @property
+    def automatic1111_http_client(self) -> httpx.AsyncClient:
+        """
+        Long lived client so connections to the backend are kept alive
+        between ready checks and generations
+        """
+        client = getattr(self, "_automatic1111_http_client", None)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5)
+            )
+            self._automatic1111_http_client = client
+        return client
+
     @property
     def automatic1111_render_settings(self):
         if self.actions["automatic1111"].enabled:
@@ -167,14 +201,42 @@ class Automatic1111Mixin:
 
         log.info("automatic1111_generate", payload=payload, url=url)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url=f"{url}/sdapi/v1/txt2img", json=payload, timeout=self.generate_timeout
-            )
+        if ijson is not None:
+            # stream the response and emit each image as soon as it has been
+            # parsed instead of buffering the whole multi-megabyte body
+            async with self.automatic1111_http_client.stream(
+                "POST",
+                f"{url}/sdapi/v1/txt2img",
+                json=payload,
+                timeout=self.generate_timeout,
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    log.error(
+                        "automatic1111_generate",
+                        status_code=response.status_code,
+                        response=response.text,
+                    )
+                    response.raise_for_status()
+
+                num_images = 0
+                async for image in ijson.items(
+                    ResponseReader(response), "images.item"
+                ):
+                    num_images += 1
+                    await self.emit_image(image)
+
+            if not num_images:
+                log.warning("automatic1111_generate", error="no images in response")
+            return
+
+        response = await self.automatic1111_http_client.post(
+            url=f"{url}/sdapi/v1/txt2img", json=payload, timeout=self.generate_timeout
+        )
 
         r = response.json()
 
-        # image = Image.open(io.BytesIO(base64.b64decode(r['images'][0])))
+        # image = Image.open(io.BytesIO(b64decode(r['images'][0])))
         # image.save('a1111-test.png')
 
         #'log.info("automatic1111_generate", saved_to="a1111-test.png")
@@ -187,8 +249,7 @@ class Automatic1111Mixin:
         Will send a GET to /sdapi/v1/memory and on 200 will return True
         """
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url=f"{self.api_url}/sdapi/v1/memory", timeout=2
-            )
-            return response.status_code == 200
+        response = await self.automatic1111_http_client.get(
+            url=f"{self.api_url}/sdapi/v1/memory", timeout=2
+        )
+        return response.status_code == 200
@@ -1,5 +1,4 @@
 import asyncio
-import base64
 import io
 import json
 import os
@@ -13,6 +12,7 @@ import structlog
 from PIL import Image
 
 from talemate.agents.base import AgentAction, AgentActionConditional, AgentActionConfig
+from talemate.util.b64 import b64encode
 
 from .handlers import register
 from .schema import RenderSettings, Resolution
@@ -298,7 +298,7 @@ class ComfyUIMixin:
         images = await self.comfyui_get_images(prompt_id)
         for node_id, node_images in images.items():
             for i, image in enumerate(node_images):
-                await self.emit_image(base64.b64encode(image).decode("utf-8"))
+                await self.emit_image(b64encode(image).decode("utf-8"))
                 # image = Image.open(io.BytesIO(image))
                 # image.save(f'comfyui-test.png')
 
@@ -38,7 +38,7 @@ async def _async_get_pods():
     asyncio wrapper around get_pods.
     """
 
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     return await loop.run_in_executor(None, runpod.get_pods)
 
 
@@ -1,5 +1,3 @@
-import random
-
 import structlog
 
 import talemate.instance as instance
@@ -119,20 +117,7 @@ class CmdPersistCharacter(TalemateCommand):
             log.debug("persist_character", name=name, never_narrate=never_narrate)
 
         character = Character(name=name)
-        character.color = random.choice(
-            [
-                "#F08080",
-                "#FFD700",
-                "#90EE90",
-                "#ADD8E6",
-                "#DDA0DD",
-                "#FFB6C1",
-                "#FAFAD2",
-                "#D3D3D3",
-                "#B0E0E6",
-                "#FFDEAD",
-            ]
-        )
+        character.set_color()
 
         loading_status("Generating character attributes...")
 
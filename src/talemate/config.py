@@ -536,17 +536,41 @@ class SceneAssetUpload(BaseModel):
     content: str = None
 
 
+# file path -> ((mtime_ns, size), parsed yaml)
+_config_data_cache: dict[str, tuple[tuple[int, int], Any]] = {}
+
+
+def _load_config_data(file_path: str):
+    """
+    Returns the parsed yaml of the config file, cached per file path and
+    invalidated when the file's modification time or size changes
+
+    The returned data is shared and must not be mutated.
+    """
+    stat = os.stat(file_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _config_data_cache.get(file_path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    with open(file_path, "r") as file:
+        config_data = yaml.safe_load(file)
+
+    _config_data_cache[file_path] = (key, config_data)
+    return config_data
+
+
 def load_config(
     file_path: str = "./config.yaml", as_model: bool = False
 ) -> Union[dict, Config]:
     """
     Load the config file from the given path.
 
-    Should cache the config and only reload if the file modification time
-    has changed since the last load
+    The parsed yaml is cached and only re-read if the file modification time
+    (or size) has changed since the last load
     """
-    with open(file_path, "r") as file:
-        config_data = yaml.safe_load(file)
+    config_data = copy.deepcopy(_load_config_data(file_path))
 
     try:
         config = Config(**config_data)
@@ -2,12 +2,12 @@
 Functions that facilitate exporting of a talemate scene
 """
 
-import base64
 import enum
 
 import pydantic
 
 from talemate.tale_mate import Scene
+from talemate.util.b64 import b64encode
 
 __all__ = [
     "ExportFormat",
@@ -56,6 +56,6 @@ async def export_talemate(scene: Scene, options: ExportOptions) -> str:
     scene_json = scene.json
 
     # encode base64
-    scene_base64 = base64.b64encode(scene_json.encode()).decode()
+    scene_base64 = b64encode(scene_json.encode()).decode()
 
     return scene_base64
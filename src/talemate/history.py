@@ -105,6 +105,7 @@ async def rebuild_history(
     ]
     
     scene.layered_history = []
+    scene.history_revision += 1
 
     scene.saved = False
 
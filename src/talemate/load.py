@@ -1,10 +1,10 @@
+import asyncio
 import enum
 import json
 import os
 
 import structlog
 
-import talemate.events as events
 import talemate.instance as instance
 from talemate import Actor, Character, Player, Scene
 from talemate.character import deactivate_character
@@ -13,6 +13,7 @@ from talemate.context import SceneIsLoading
 from talemate.exceptions import UnknownDataSpec
 from talemate.game.state import GameState
 from talemate.scene_message import (
+    MESSAGE_INIT_FIELDS,
     MESSAGES,
     CharacterMessage,
     DirectorMessage,
@@ -63,7 +64,7 @@ async def load_scene(scene, file_path, conv_client, reset: bool = False):
                 return await load_scene_from_character_card(scene, file_path)
 
             # a json file was uploaded, load the scene data
-            with open(file_path, "r") as f:
+            with open(file_path, "r", encoding="utf-8") as f:
                 scene_data = json.load(f)
 
             # check if the data is a character card
@@ -254,19 +255,12 @@ async def load_scene_from_data(
     if not scene.memory_session_id:
         scene.set_new_memory_session_id()
 
-    for ah in scene.archived_history:
-        if reset:
-            break
-        ts = ah.get("ts", "PT1S")
-
-        if not ah.get("ts"):
-            ah["ts"] = ts
-
-        scene.signals["archive_add"].send(
-            events.ArchiveEvent(
-                scene=scene, event_type="archive_add", text=ah["text"], ts=ts
-            )
-        )
+    if not reset:
+        # archived history is added to memory in a single batch in the
+        # background
+        archive_items = scene.archive_memory_items()
+        if archive_items:
+            asyncio.ensure_future(memory.add_many(archive_items))
 
     for character_name, character_data in scene_data.get(
         "inactive_characters", {}
@@ -307,7 +301,7 @@ async def transfer_character(scene, scene_json_path, character_name):
     :return: The updated scene with the new character.
     """
     # Load the json file
-    with open(scene_json_path, "r") as f:
+    with open(scene_json_path, "r", encoding="utf-8") as f:
         scene_data = json.load(f)
 
     agent = scene.get_helper("conversation").agent
@@ -514,8 +508,11 @@ def _prepare_history(entry):
         entry.pop("source")
 
     cls = MESSAGES.get(typ, SceneMessage)
+    init_fields = MESSAGE_INIT_FIELDS[cls]
 
-    return cls(**entry)
+    return cls(
+        **{key: value for key, value in entry.items() if key in init_fields}
+    )
 
 
 def _prepare_legacy_history(entry):
@@ -1,10 +1,48 @@
 import json
+import os
+import threading
 
 from talemate.scene_message import SceneMessage
+from talemate.util.fastjson import dumps
 
 
 class SceneEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, SceneMessage):
-            return obj.__dict__()
+            return obj.to_dict()
         return super().default(obj)
+
+
+def _orjson_default(obj):
+    if isinstance(obj, SceneMessage):
+        return obj.to_dict()
+    raise TypeError
+
+
+def dumps_scene(scene_data: dict) -> str:
+    """
+    Serializes scene data to an indented json string
+
+    Scene messages are encoded via `to_dict`, see talemate.util.fastjson
+    """
+    return dumps(scene_data, indent=True, default=_orjson_default, cls=SceneEncoder)
+
+
+def write_scene_file(filepath: str, scene_json: str):
+    """
+    Writes an encoded scene (see dumps_scene) to a json file
+
+    The data is written to a temporary file next to the target, which then
+    replaces it, so the scene file is never left partially written
+    """
+    tmp_path = f"{filepath}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(scene_json.encode("utf-8"))
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import base64
 import hashlib
 import os
 from typing import TYPE_CHECKING, Any
@@ -12,6 +11,8 @@ if TYPE_CHECKING:
 
 import structlog
 
+from talemate.util.b64 import b64decode, b64encode
+
 __all__ = ["Asset", "SceneAssets"]
 
 log = structlog.get_logger("talemate.scene_assets")
@@ -30,7 +31,7 @@ class Asset(pydantic.BaseModel):
         asset_path = os.path.join(asset_directory, f"{self.id}.{self.file_type}")
 
         with open(asset_path, "rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
+            return b64encode(f.read()).decode("utf-8")
 
 
 class SceneAssets:
@@ -74,7 +75,7 @@ class SceneAssets:
     def dict(self, *args, **kwargs):
         return {
             "cover_image": self.cover_image,
-            "assets": {asset.id: asset.dict() for asset in self.assets.values()},
+            "assets": {asset.id: asset.model_dump() for asset in self.assets.values()},
         }
 
     def load_assets(self, assets_dict: dict):
@@ -154,7 +155,7 @@ class SceneAssets:
         """
 
         media_type = image_data.split(";")[0].split(":")[1]
-        image_bytes = base64.b64decode(image_data.split(",")[1])
+        image_bytes = b64decode(image_data.split(",")[1])
         file_extension = media_type.split("/")[1]
 
         return self.add_asset(image_bytes, file_extension, media_type)
@@ -209,7 +210,7 @@ class SceneAssets:
 
         bytes = self.get_asset_bytes(asset_id)
 
-        return base64.b64encode(bytes).decode("utf-8")
+        return b64encode(bytes).decode("utf-8")
 
     def remove_asset(self, asset_id: str):
         """
@@ -1,6 +1,9 @@
 import enum
+import hashlib
+import itertools
 import re
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
 
 __all__ = [
     "SceneMessage",
@@ -12,20 +15,30 @@ __all__ = [
     "ContextInvestigationMessage",
     "Flags",
     "MESSAGES",
+    "MESSAGE_INIT_FIELDS",
 ]
 
-_message_id = 0
+_message_id_counter = itertools.count(1)
+
+RE_SECOND_PERSON = re.compile(r"\b(yourself|your|you)\b")
+
+SECOND_TO_FIRST_PERSON = {
+    "yourself": "myself",
+    "your": "my",
+    "you": "i",
+}
+
+# removes quotes and asterisks from the raw character message
+RAW_STRIP_TABLE = str.maketrans("", "", '"*')
 
 
 def get_message_id():
-    global _message_id
-    _message_id += 1
-    return _message_id
+    return next(_message_id_counter)
 
 
 def reset_message_id():
-    global _message_id
-    _message_id = 0
+    global _message_id_counter
+    _message_id_counter = itertools.count(1)
 
 
 class Flags(enum.IntFlag):
@@ -37,7 +50,7 @@ class Flags(enum.IntFlag):
     HIDDEN = 1
 
 
-@dataclass
+@dataclass(slots=True)
 class SceneMessage:
     """
     Base class for all messages that are sent to the scene.
@@ -56,6 +69,17 @@ class SceneMessage:
 
     flags: Flags = Flags.NONE
 
+    # (message, fingerprint) - recomputed when the message is replaced
+    _fingerprint: tuple[str, str] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    # (message, {rendered text: token count}) - reset when the message is
+    # replaced
+    _token_count: tuple[str, dict[str, int]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     typ = "scene"
 
     def __str__(self):
@@ -67,13 +91,10 @@ class SceneMessage:
     def __len__(self):
         return len(self.message)
 
-    def __in__(self, other):
-        return other in self.message
-
     def __contains__(self, other):
-        return self.message in other
+        return other in self.message
 
-    def __dict__(self) -> dict:
+    def to_dict(self) -> dict:
         rv = {
             "message": self.message,
             "id": self.id,
@@ -116,7 +137,37 @@ class SceneMessage:
         """
         Returns a unique hash fingerprint for the message
         """
-        return str(hash(self.message))[:16]
+        cached = self._fingerprint
+        if cached is None or cached[0] is not self.message:
+            fingerprint = hashlib.blake2b(
+                self.message.encode(), digest_size=8
+            ).hexdigest()
+            cached = self._fingerprint = (self.message, fingerprint)
+        return cached[1]
+
+    @property
+    def token_count(self) -> int:
+        """
+        Returns the (approximate) number of tokens in the message
+        """
+        return self.count_tokens_for(str(self))
+
+    def count_tokens_for(self, text: str) -> int:
+        """
+        Returns the (approximate) number of tokens in a rendering of this
+        message (e.g., the output of as_format), counts are cached per text
+        """
+        # imported here as talemate.util imports this module
+        from talemate.util import count_tokens
+
+        cached = self._token_count
+        if cached is None or cached[0] is not self.message:
+            cached = self._token_count = (self.message, {})
+
+        count = cached[1].get(text)
+        if count is None:
+            count = cached[1][text] = count_tokens(text)
+        return count
 
     @property
     def source_agent(self) -> str | None:
@@ -153,18 +204,36 @@ class SceneMessage:
             self.meta = {}
         self.meta.update(kwargs)
 
-@dataclass
+@dataclass(slots=True)
 class CharacterMessage(SceneMessage):
     typ = "character"
     source: str = "ai"
     from_choice: str | None = None
 
+    # (message, character name, text after the name) - re-parsed
+    # when the message is replaced
+    _parsed: tuple[str, str, str] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    # (message, movie script line) - rebuilt when the message is replaced
+    _movie_script: tuple[str, str] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     def __str__(self):
         return self.message
 
+    def _parse(self) -> tuple[str, str, str]:
+        parsed = self._parsed
+        if parsed is None or parsed[0] is not self.message:
+            name, _, text = self.message.partition(":")
+            parsed = self._parsed = (self.message, name, text)
+        return parsed
+
     @property
     def character_name(self):
-        return self.message.split(":", 1)[0]
+        return self._parse()[1]
 
     @property
     def secondary_source(self):
@@ -172,11 +241,11 @@ class CharacterMessage(SceneMessage):
 
     @property
     def raw(self):
-        return self.message.split(":", 1)[1].replace('"', "").replace("*", "").strip()
+        return self._parse()[2].translate(RAW_STRIP_TABLE).strip()
     
     @property
     def without_name(self) -> str:
-        return self.message.split(":", 1)[1]
+        return self._parse()[2]
 
     @property
     def as_movie_script(self):
@@ -188,12 +257,17 @@ class CharacterMessage(SceneMessage):
         {dialogue}
         """
 
-        message = self.message.split(":", 1)[1].strip()
-
-        return f"\n{self.character_name.upper()}\n{message}\nEND-OF-LINE\n"
+        cached = self._movie_script
+        if cached is None or cached[0] is not self.message:
+            _, name, message = self._parse()
+            cached = self._movie_script = (
+                self.message,
+                f"\n{name.upper()}\n{message.strip()}\nEND-OF-LINE\n",
+            )
+        return cached[1]
 
-    def __dict__(self) -> dict:
-        rv = super().__dict__()
+    def to_dict(self) -> dict:
+        rv = SceneMessage.to_dict(self)
 
         if self.from_choice:
             rv["from_choice"] = self.from_choice
@@ -206,17 +280,35 @@ class CharacterMessage(SceneMessage):
         return self.message
 
 
-@dataclass
+@dataclass(slots=True)
 class NarratorMessage(SceneMessage):
     source: str = "progress_story"
     typ = "narrator"
 
 
-@dataclass
+@dataclass(slots=True)
 class DirectorMessage(SceneMessage):
     action: str = "actor_instruction"
     typ = "director"
 
+    # (message, character name, dialogue) parsed from the transformed
+    # message - re-parsed when the message is replaced
+    _parsed: tuple[str, str, str] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    # (message, action, {(format, mode): formatted message}) - see as_format
+    _formatted: tuple[str, str, dict] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def _parse(self) -> tuple[str, str, str]:
+        parsed = self._parsed
+        if parsed is None or parsed[0] is not self.message:
+            name, _, dialogue = self.transformed_message.partition(":")
+            parsed = self._parsed = (self.message, name, dialogue)
+        return parsed
+
     @property
     def transformed_message(self):
         return self.message.replace("Director instructs ", "")
@@ -224,13 +316,13 @@ class DirectorMessage(SceneMessage):
     @property
     def character_name(self):
         if self.action == "actor_instruction":
-            return self.transformed_message.split(":", 1)[0]
+            return self._parse()[1]
         return ""
 
     @property
     def dialogue(self):
         if self.action == "actor_instruction":
-            return self.transformed_message.split(":", 1)[1]
+            return self._parse()[2]
         return self.message
 
     @property
@@ -255,14 +347,11 @@ class DirectorMessage(SceneMessage):
         if not self.character_name:
             return instructions
 
-        # then we replace yourself with myself using regex, taking care of word boundaries
-        instructions = re.sub(r"\byourself\b", "myself", instructions)
-
-        # then we replace your with my using regex, taking care of word boundaries
-        instructions = re.sub(r"\byour\b", "my", instructions)
-
-        # then we replace you with i using regex, taking care of word boundaries
-        instructions = re.sub(r"\byou\b", "i", instructions)
+        # then we replace yourself -> myself, your -> my and you -> i in a
+        # single pass, taking care of word boundaries
+        instructions = RE_SECOND_PERSON.sub(
+            lambda match: SECOND_TO_FIRST_PERSON[match.group(1)], instructions
+        )
 
         return f"{self.character_name} thinks: I should {instructions}"
 
@@ -270,8 +359,8 @@ class DirectorMessage(SceneMessage):
     def as_story_progression(self):
         return f"{self.character_name}'s next action: {self.instructions}"
 
-    def __dict__(self) -> dict:
-        rv = super().__dict__()
+    def to_dict(self) -> dict:
+        rv = SceneMessage.to_dict(self)
 
         if self.action:
             rv["action"] = self.action
@@ -286,6 +375,19 @@ class DirectorMessage(SceneMessage):
 
     def as_format(self, format: str, **kwargs) -> str:
         mode = kwargs.get("mode", "direction")
+
+        # the same message is formatted for every context history, only
+        # re-format when the message or the requested format has changed
+        cached = self._formatted
+        if cached is None or cached[0] is not self.message or cached[1] != self.action:
+            cached = self._formatted = (self.message, self.action, {})
+
+        formatted = cached[2].get((format, mode))
+        if formatted is None:
+            formatted = cached[2][(format, mode)] = self._as_format(format, mode)
+        return formatted
+
+    def _as_format(self, format: str, mode: str) -> str:
         if format == "movie_script":
             if mode == "internal_monologue":
                 return f"\n({self.as_inner_monologue})\n"
@@ -298,18 +400,18 @@ class DirectorMessage(SceneMessage):
                 return f"# {self.as_story_progression}"
 
 
-@dataclass
+@dataclass(slots=True)
 class TimePassageMessage(SceneMessage):
     ts: str = "PT0S"
     source: str = "manual"
     typ = "time"
 
-    def __dict__(self) -> dict:
-        rv = super().__dict__()
+    def to_dict(self) -> dict:
+        rv = SceneMessage.to_dict(self)
         rv["ts"] = self.ts
         return rv
 
-@dataclass
+@dataclass(slots=True)
 class ReinforcementMessage(SceneMessage):
     typ = "reinforcement"
 
@@ -330,7 +432,7 @@ class ReinforcementMessage(SceneMessage):
         return f"\n{self.message}\n"
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextInvestigationMessage(SceneMessage):
     typ = "context_investigation"
     source: str = "ai"
@@ -371,8 +473,8 @@ class ContextInvestigationMessage(SceneMessage):
             f"# {self.title}: {self.message}"
         )
 
-    def __dict__(self) -> dict:
-        rv = super().__dict__()
+    def to_dict(self) -> dict:
+        rv = SceneMessage.to_dict(self)
         rv["sub_type"] = self.sub_type
         return rv
         
@@ -384,12 +486,22 @@ class ContextInvestigationMessage(SceneMessage):
 
 
 
-MESSAGES = {
-    "scene": SceneMessage,
-    "character": CharacterMessage,
-    "narrator": NarratorMessage,
-    "director": DirectorMessage,
-    "time": TimePassageMessage,
-    "reinforcement": ReinforcementMessage,
-    "context_investigation": ContextInvestigationMessage,
-}
+MESSAGES = MappingProxyType(
+    {
+        "scene": SceneMessage,
+        "character": CharacterMessage,
+        "narrator": NarratorMessage,
+        "director": DirectorMessage,
+        "time": TimePassageMessage,
+        "reinforcement": ReinforcementMessage,
+        "context_investigation": ContextInvestigationMessage,
+    }
+)
+
+# message class -> names of the fields accepted by its constructor
+MESSAGE_INIT_FIELDS = MappingProxyType(
+    {
+        cls: frozenset(f.name for f in fields(cls) if f.init)
+        for cls in MESSAGES.values()
+    }
+)
@@ -12,10 +12,14 @@ from talemate import VERSION
 from talemate.config import load_config
 from talemate.client.system_prompts import RENDER_CACHE as SYSTEM_PROMPTS_CACHE
 from talemate.server.websocket_server import WebsocketHandler
+from talemate.util.fastjson import dumps as dump_message
 
 log = structlog.get_logger("talemate")
 from talemate.context import ActiveScene, Interaction
 
+# max number of queued messages coalesced into a single websocket frame
+SEND_BATCH_SIZE = 64
+
 
 async def websocket_endpoint(websocket, path):
     # Create a queue for outgoing messages
@@ -50,7 +54,27 @@ async def websocket_endpoint(websocket, path):
                 continue
 
             message = await message_queue.get()
-            await websocket.send(json.dumps(message))
+
+            # anything else that has been queued up in the meantime (e.g.,
+            # backscroll on scene load) goes out in the same frame
+            if message_queue.empty():
+                await websocket.send(dump_message(message))
+                continue
+
+            messages = []
+            while True:
+                # messages queued as a batch already (queue_put_batch) are
+                # flattened, the frontend only unpacks one level
+                if isinstance(message, dict) and message.get("type") == "batch":
+                    messages.extend(message["items"])
+                else:
+                    messages.append(message)
+
+                if message_queue.empty() or len(messages) >= SEND_BATCH_SIZE:
+                    break
+                message = message_queue.get_nowait()
+
+            await websocket.send(dump_message({"type": "batch", "items": messages}))
 
 
     # Create a task to send regular client status updates
@@ -44,7 +44,7 @@ class CharacterImporterServerPlugin:
 
         scene_path = list_characters_data.scene_path
 
-        with open(scene_path, "r") as f:
+        with open(scene_path, "r", encoding="utf-8") as f:
             scene_data = json.load(f)
 
         sorted_characters = scene_data.get("characters", [])
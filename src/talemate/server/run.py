@@ -30,8 +30,9 @@ async def install_punkt():
     import nltk
     
     log.info("Downloading NLTK punkt tokenizer")
-    await asyncio.get_event_loop().run_in_executor(None, nltk.download, "punkt")
-    await asyncio.get_event_loop().run_in_executor(None, nltk.download, "punkt_tab")
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, nltk.download, "punkt")
+    await loop.run_in_executor(None, nltk.download, "punkt_tab")
     log.info("Download complete")
 
 async def log_stream(stream, log_func):
@@ -122,8 +123,11 @@ def run_server(args):
                 age=template_override.age_difference,
             )
 
+    # the default asyncio loop is used on purpose: prompt helpers and the game
+    # engine rely on nest_asyncio for re-entrant run_until_complete calls and
+    # nest_asyncio cannot patch alternative loop implementations (e.g. uvloop)
     loop = asyncio.get_event_loop()
-    
+
     start_server = websockets.serve(
         websocket_endpoint, args.host, args.port, max_size=2**23
     )
@@ -1,5 +1,4 @@
 import asyncio
-import base64
 import os
 import traceback
 
@@ -16,6 +15,7 @@ from talemate.emit import Emission, Receiver, abort_wait_for_input, emit
 from talemate.files import list_scenes_directory
 from talemate.load import load_scene
 from talemate.scene_assets import Asset
+from talemate.util.b64 import b64decode
 from talemate.agents.memory.exceptions import MemoryAgentError
 from talemate.server import (
     assistant,
@@ -235,6 +235,15 @@ class WebsocketHandler(Receiver):
         # Schedule the put coroutine to run as soon as possible
         loop.call_soon_threadsafe(lambda: self.out_queue.put_nowait(data))
 
+    def queue_put_batch(self, messages: list[dict]):
+        """
+        Queues multiple messages to be sent as a single websocket frame
+        """
+        if len(messages) == 1:
+            self.queue_put(messages[0])
+            return
+        self.queue_put({"type": "batch", "items": messages})
+
     async def configure_clients(self, clients):
         existing = set(self.llm_clients.keys())
 
@@ -550,6 +559,17 @@ class WebsocketHandler(Receiver):
         )
 
     def handle_archived_history(self, emission: Emission):
+        if "entry" in emission.data:
+            # a single entry was appended to the archived history
+            self.queue_put(
+                {
+                    "type": "scene_history",
+                    "entry": emission.data["entry"],
+                    "index": emission.data["index"],
+                }
+            )
+            return
+
         self.queue_put(
             {
                 "type": "scene_history",
@@ -685,7 +705,7 @@ class WebsocketHandler(Receiver):
         :param file_data: base64 encoded string representing the file data
         """
         # Decode the base64 string back into bytes
-        file_bytes = base64.b64decode(b64data)
+        file_bytes = b64decode(b64data)
         await asyncio.sleep(0.1)
 
         return file_bytes
@@ -847,7 +867,7 @@ class WebsocketHandler(Receiver):
 
     def handle_character_card_upload(self, image_data_url: str, filename: str) -> str:
         image_type = image_data_url.split(";")[0].split(":")[1]
-        image_data = base64.b64decode(image_data_url.split(",")[1])
+        image_data = b64decode(image_data_url.split(",")[1])
         characters_path = os.path.join("./scenes", "characters")
 
         filepath = os.path.join(characters_path, filename)
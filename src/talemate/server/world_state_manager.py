@@ -1,6 +1,7 @@
 import asyncio
+import traceback
 import uuid
-from typing import Any, Union
+from typing import Any, Callable, Union
 
 import pydantic
 import structlog
@@ -15,6 +16,10 @@ import talemate.game.focal as focal
 
 log = structlog.get_logger("talemate.server.world_state_manager")
 
+# seconds to wait for further updates to the same character before
+# resending its details
+CHARACTER_UPDATE_DEBOUNCE = 0.05
+
 
 class UpdateCharacterAttributePayload(pydantic.BaseModel):
     name: str
@@ -186,30 +191,56 @@ class SuggestionPayload(pydantic.BaseModel):
 class WorldStateManagerPlugin:
     router = "world_state_manager"
 
+    # action name -> handle_<action> function, see bottom of module
+    _handlers: dict[str, Callable] = {}
+
     @property
     def scene(self):
         return self.websocket_handler.scene
 
     @property
     def world_state_manager(self):
-        return WorldStateManager(self.scene)
+        # re-created when the handler's scene (or its world state) is swapped out
+        scene = self.scene
+        manager = self._world_state_manager
+        if (
+            manager is None
+            or manager.scene is not scene
+            or manager.world_state is not scene.world_state
+        ):
+            manager = self._world_state_manager = WorldStateManager(scene)
+        return manager
 
     def __init__(self, websocket_handler):
         self.websocket_handler = websocket_handler
+        self._world_state_manager: WorldStateManager | None = None
+        # character name -> (queued messages, scheduled flush task)
+        self._pending_character_updates: dict[
+            str, tuple[list[dict], asyncio.Task]
+        ] = {}
 
     async def handle(self, data: dict):
         log.info("World state manager action", action=data.get("action"))
 
-        fn = getattr(self, f"handle_{data.get('action')}", None)
+        fn = self._handlers.get(data.get("action"))
 
         if fn is None:
             return
 
-        await fn(data)
+        await fn(self, data)
 
-    async def signal_operation_done(self):
-        self.websocket_handler.queue_put(
-            {"type": "world_state_manager", "action": "operation_done", "data": {}}
+    async def signal_operation_done(self, *messages: dict):
+        """
+        Signals the frontend that the current operation is done
+
+        Any messages passed are sent ahead of operation_done in the same
+        websocket frame.
+        """
+        self.websocket_handler.queue_put_batch(
+            [
+                *messages,
+                {"type": "world_state_manager", "action": "operation_done", "data": {}},
+            ]
         )
 
         if self.scene.auto_save:
@@ -228,22 +259,67 @@ class WorldStateManagerPlugin:
             }
         )
 
-    async def handle_get_character_details(self, data):
+    async def signal_character_updated(self, name: str, *messages: dict):
+        """
+        Schedules resending the character's details and signaling that the
+        operation is done, sending the messages, details and operation_done
+        as one frame
+
+        Updates to the same character arriving within
+        CHARACTER_UPDATE_DEBOUNCE seconds are coalesced into a single
+        details refresh.
+        """
+        pending = self._pending_character_updates.get(name)
+
+        if pending:
+            pending[0].extend(messages)
+            return
+
+        task = asyncio.create_task(self._flush_character_update(name))
+        self._pending_character_updates[name] = (list(messages), task)
+
+    async def _flush_character_update(self, name: str):
+        await asyncio.sleep(CHARACTER_UPDATE_DEBOUNCE)
+
+        messages, _ = self._pending_character_updates.pop(name)
+
+        try:
+            details_message = await self.character_details_message(name)
+
+            if details_message:
+                messages.append(details_message)
+
+            await self.signal_operation_done(*messages)
+        except Exception as e:
+            log.error("character update", error=traceback.format_exc())
+            self.websocket_handler.queue_put(
+                {
+                    "plugin": self.router,
+                    "type": "error",
+                    "error": str(e),
+                }
+            )
+
+    async def character_details_message(self, name: str) -> dict | None:
         character_details = await self.world_state_manager.get_character_details(
-            data["name"]
+            name
         )
 
         if not character_details:
-            log.error("Character not found", name=data["name"])
-            return
+            log.error("Character not found", name=name)
+            return None
 
-        self.websocket_handler.queue_put(
-            {
-                "type": "world_state_manager",
-                "action": "character_details",
-                "data": character_details.model_dump(),
-            }
-        )
+        return {
+            "type": "world_state_manager",
+            "action": "character_details",
+            "data": character_details.model_dump(),
+        }
+
+    async def handle_get_character_details(self, data):
+        details_message = await self.character_details_message(data["name"])
+
+        if details_message:
+            self.websocket_handler.queue_put(details_message)
 
     async def handle_get_world(self, data):
         world = await self.world_state_manager.get_world()
@@ -279,85 +355,76 @@ class WorldStateManagerPlugin:
         )
 
     async def handle_update_character_color(self, data):
-        payload = UpdateCharacterColorPayload(**data)
+        payload = UpdateCharacterColorPayload.model_validate(data)
 
         await self.world_state_manager.update_character_color(
             payload.name, payload.color
         )
 
-        self.websocket_handler.queue_put(
+        # send update along with refreshed character details
+        await self.signal_character_updated(
+            payload.name,
             {
                 "type": "world_state_manager",
                 "action": "character_color_updated",
                 "data": payload.model_dump(),
-            }
+            },
         )
-
-        # resend character details
-        await self.handle_get_character_details({"name": payload.name})
-        await self.signal_operation_done()
         self.scene.emit_status()
 
     async def handle_update_character_attribute(self, data):
-        payload = UpdateCharacterAttributePayload(**data)
+        payload = UpdateCharacterAttributePayload.model_validate(data)
 
         await self.world_state_manager.update_character_attribute(
             payload.name, payload.attribute, payload.value
         )
 
-        self.websocket_handler.queue_put(
+        # send update along with refreshed character details
+        await self.signal_character_updated(
+            payload.name,
             {
                 "type": "world_state_manager",
                 "action": "character_attribute_updated",
                 "data": payload.model_dump(),
-            }
+            },
         )
 
-        # resend character details
-        await self.handle_get_character_details({"name": payload.name})
-
-        await self.signal_operation_done()
-
     async def handle_update_character_description(self, data):
-        payload = UpdateCharacterAttributePayload(**data)
+        payload = UpdateCharacterAttributePayload.model_validate(data)
 
         await self.world_state_manager.update_character_description(
             payload.name, payload.value
         )
 
-        self.websocket_handler.queue_put(
+        # send update along with refreshed character details
+        await self.signal_character_updated(
+            payload.name,
             {
                 "type": "world_state_manager",
                 "action": "character_description_updated",
                 "data": payload.model_dump(),
-            }
+            },
         )
 
-        # resend character details
-        await self.handle_get_character_details({"name": payload.name})
-        await self.signal_operation_done()
-
     async def handle_update_character_detail(self, data):
-        payload = UpdateCharacterDetailPayload(**data)
+        payload = UpdateCharacterDetailPayload.model_validate(data)
 
         await self.world_state_manager.update_character_detail(
             payload.name, payload.detail, payload.value
         )
 
-        self.websocket_handler.queue_put(
+        # send update along with refreshed character details
+        await self.signal_character_updated(
+            payload.name,
             {
                 "type": "world_state_manager",
                 "action": "character_detail_updated",
                 "data": payload.model_dump(),
-            }
+            },
         )
 
-        # resend character details
-        await self.handle_get_character_details({"name": payload.name})
-        await self.signal_operation_done()
-
     async def handle_set_character_detail_reinforcement(self, data):
-        payload = SetCharacterDetailReinforcementPayload(**data)
+        payload = SetCharacterDetailReinforcementPayload.model_validate(data)
 
         await self.world_state_manager.add_detail_reinforcement(
             payload.name,
@@ -369,20 +436,18 @@ class WorldStateManagerPlugin:
             payload.update_state,
         )
 
-        self.websocket_handler.queue_put(
+        # send update along with refreshed character details
+        await self.signal_character_updated(
+            payload.name,
             {
                 "type": "world_state_manager",
                 "action": "character_detail_reinforcement_set",
                 "data": payload.model_dump(),
-            }
+            },
         )
 
-        # resend character details
-        await self.handle_get_character_details({"name": payload.name})
-        await self.signal_operation_done()
-
     async def handle_run_character_detail_reinforcement(self, data):
-        payload = CharacterDetailReinforcementPayload(**data)
+        payload = CharacterDetailReinforcementPayload.model_validate(data)
 
         log.debug(
             "Run character detail reinforcement",
@@ -395,39 +460,35 @@ class WorldStateManagerPlugin:
             payload.name, payload.question, reset=payload.reset
         )
 
-        self.websocket_handler.queue_put(
+        # send update along with refreshed character details
+        await self.signal_character_updated(
+            payload.name,
             {
                 "type": "world_state_manager",
                 "action": "character_detail_reinforcement_run",
                 "data": payload.model_dump(),
-            }
+            },
         )
 
-        # resend character details
-        await self.handle_get_character_details({"name": payload.name})
-        await self.signal_operation_done()
-
     async def handle_delete_character_detail_reinforcement(self, data):
-        payload = CharacterDetailReinforcementPayload(**data)
+        payload = CharacterDetailReinforcementPayload.model_validate(data)
 
         await self.world_state_manager.delete_detail_reinforcement(
             payload.name, payload.question
         )
 
-        self.websocket_handler.queue_put(
+        # send update along with refreshed character details
+        await self.signal_character_updated(
+            payload.name,
             {
                 "type": "world_state_manager",
                 "action": "character_detail_reinforcement_deleted",
                 "data": payload.model_dump(),
-            }
+            },
         )
 
-        # resend character details
-        await self.handle_get_character_details({"name": payload.name})
-        await self.signal_operation_done()
-
     async def handle_update_character_actor(self, data):
-        payload = CharacterActorPayload(**data)
+        payload = CharacterActorPayload.model_validate(data)
 
         await self.world_state_manager.update_character_actor(
             payload.name,
@@ -435,20 +496,18 @@ class WorldStateManagerPlugin:
             payload.dialogue_examples,
         )
 
-        self.websocket_handler.queue_put(
+        # send update along with refreshed character details
+        await self.signal_character_updated(
+            payload.name,
             {
                 "type": "world_state_manager",
                 "action": "character_actor_updated",
                 "data": payload.model_dump(),
-            }
+            },
         )
 
-        # resend character details
-        await self.handle_get_character_details({"name": payload.name})
-        await self.signal_operation_done()
-
     async def handle_save_world_entry(self, data):
-        payload = SaveWorldEntryPayload(**data)
+        payload = SaveWorldEntryPayload.model_validate(data)
 
         log.debug(
             "Save world entry", id=payload.id, text=payload.text, meta=payload.meta
@@ -472,7 +531,7 @@ class WorldStateManagerPlugin:
         self.scene.world_state.emit()
 
     async def handle_delete_world_entry(self, data):
-        payload = DeleteWorldEntryPayload(**data)
+        payload = DeleteWorldEntryPayload.model_validate(data)
 
         log.debug("Delete world entry", id=payload.id)
 
@@ -493,7 +552,7 @@ class WorldStateManagerPlugin:
         self.scene.emit_status()
 
     async def handle_set_world_state_reinforcement(self, data):
-        payload = SetWorldEntryReinforcementPayload(**data)
+        payload = SetWorldEntryReinforcementPayload.model_validate(data)
 
         log.debug(
             "Set world state reinforcement",
@@ -528,7 +587,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_run_world_state_reinforcement(self, data):
-        payload = WorldEntryReinforcementPayload(**data)
+        payload = WorldEntryReinforcementPayload.model_validate(data)
 
         await self.world_state_manager.run_detail_reinforcement(
             None, payload.question, payload.reset
@@ -558,7 +617,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_delete_world_state_reinforcement(self, data):
-        payload = WorldEntryReinforcementPayload(**data)
+        payload = WorldEntryReinforcementPayload.model_validate(data)
 
         await self.world_state_manager.delete_detail_reinforcement(
             None, payload.question
@@ -577,7 +636,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_query_context_db(self, data):
-        payload = QueryContextDBPayload(**data)
+        payload = QueryContextDBPayload.model_validate(data)
 
         log.debug("Query context db", query=payload.query, meta=payload.meta)
 
@@ -596,7 +655,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_update_context_db(self, data):
-        payload = UpdateContextDBPayload(**data)
+        payload = UpdateContextDBPayload.model_validate(data)
 
         log.debug(
             "Update context db", text=payload.text, meta=payload.meta, id=payload.id
@@ -617,7 +676,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_delete_context_db(self, data):
-        payload = DeleteContextDBPayload(**data)
+        payload = DeleteContextDBPayload.model_validate(data)
 
         log.debug("Delete context db", id=payload.id)
 
@@ -634,7 +693,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_set_pin(self, data):
-        payload = UpdatePinPayload(**data)
+        payload = UpdatePinPayload.model_validate(data)
 
         log.debug(
             "Set pin",
@@ -662,7 +721,7 @@ class WorldStateManagerPlugin:
         self.scene.emit_status()
 
     async def handle_remove_pin(self, data):
-        payload = RemovePinPayload(**data)
+        payload = RemovePinPayload.model_validate(data)
 
         log.debug("Remove pin", entry_id=payload.entry_id)
 
@@ -682,7 +741,7 @@ class WorldStateManagerPlugin:
         self.scene.emit_status()
 
     async def handle_apply_template(self, data):
-        payload = ApplyWorldStateTemplatePayload(**data)
+        payload = ApplyWorldStateTemplatePayload.model_validate(data)
 
         log.debug("Apply world state template", payload=payload)
 
@@ -707,7 +766,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_save_template(self, data):
-        payload = SaveWorldStateTemplatePayload(**data)
+        payload = SaveWorldStateTemplatePayload.model_validate(data)
 
         log.debug("Save world state template", template=payload.template)
 
@@ -725,7 +784,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_delete_template(self, data):
-        payload = DeleteWorldStateTemplatePayload(**data)
+        payload = DeleteWorldStateTemplatePayload.model_validate(data)
         template = payload.template
 
         log.debug(
@@ -748,7 +807,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_apply_templates(self, data):
-        payload = ApplyWorldStateTemplatesPayload(**data)
+        payload = ApplyWorldStateTemplatesPayload.model_validate(data)
 
         log.debug("Applying world state templates", templates=payload.templates)
 
@@ -797,7 +856,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_save_template_group(self, data):
-        payload = SaveWorldStateTemplateGroupPayload(**data)
+        payload = SaveWorldStateTemplateGroupPayload.model_validate(data)
         group = payload.group
         log.debug("Save template group", group=group)
 
@@ -816,7 +875,7 @@ class WorldStateManagerPlugin:
 
     async def handle_delete_template_group(self, data):
 
-        payload = DeleteWorldStateTemplateGroupPayload(**data)
+        payload = DeleteWorldStateTemplateGroupPayload.model_validate(data)
         group = payload.group
 
         log.debug("Remove template group", group=group)
@@ -835,7 +894,7 @@ class WorldStateManagerPlugin:
         await self.signal_operation_done()
 
     async def handle_generate_character_dialogue_instructions(self, data):
-        payload = SelectiveCharacterPayload(**data)
+        payload = SelectiveCharacterPayload.model_validate(data)
 
         log.debug("Generate character dialogue instructions", name=payload.name)
 
@@ -868,7 +927,7 @@ class WorldStateManagerPlugin:
         self.scene.emit_status()
 
     async def handle_delete_character(self, data):
-        payload = SelectiveCharacterPayload(**data)
+        payload = SelectiveCharacterPayload.model_validate(data)
         character = self.scene.get_character(payload.name)
 
         if not character:
@@ -891,7 +950,7 @@ class WorldStateManagerPlugin:
         self.scene.emit_status()
 
     async def handle_activate_character(self, data):
-        payload = SelectiveCharacterPayload(**data)
+        payload = SelectiveCharacterPayload.model_validate(data)
         character = self.scene.get_character(payload.name)
 
         if not character:
@@ -914,7 +973,7 @@ class WorldStateManagerPlugin:
         self.scene.emit_status()
 
     async def handle_deactivate_character(self, data):
-        payload = SelectiveCharacterPayload(**data)
+        payload = SelectiveCharacterPayload.model_validate(data)
         character = self.scene.get_character(payload.name)
 
         if not character:
@@ -937,7 +996,7 @@ class WorldStateManagerPlugin:
         self.scene.emit_status()
 
     async def handle_create_character(self, data):
-        payload = CreateCharacterPayload(**data)
+        payload = CreateCharacterPayload.model_validate(data)
 
         character = await self.world_state_manager.create_character(
             generate=payload.generate,
@@ -968,7 +1027,7 @@ class WorldStateManagerPlugin:
         self.scene.emit_status()
 
     async def handle_update_scene_outline(self, data):
-        payload = SceneOutlinePayload(**data)
+        payload = SceneOutlinePayload.model_validate(data)
 
         await self.world_state_manager.update_scene_outline(**payload.model_dump())
 
@@ -985,7 +1044,7 @@ class WorldStateManagerPlugin:
         await self.scene.emit_history()
 
     async def handle_update_scene_settings(self, data):
-        payload = SceneSettingsPayload(**data)
+        payload = SceneSettingsPayload.model_validate(data)
 
         await self.world_state_manager.update_scene_settings(**payload.model_dump())
 
@@ -1020,7 +1079,7 @@ class WorldStateManagerPlugin:
         self.scene.world_state.emit()
 
     async def handle_save_scene(self, data):
-        payload = SaveScenePayload(**data)
+        payload = SaveScenePayload.model_validate(data)
 
         log.debug("Save scene", copy=payload.save_as, project_name=payload.project_name)
         
@@ -1054,7 +1113,7 @@ class WorldStateManagerPlugin:
 
     async def handle_regenerate_history(self, data):
 
-        payload = RegenerateHistoryPayload(**data)
+        payload = RegenerateHistoryPayload.model_validate(data)
         
         async def callback():
             self.scene.emit_status()
@@ -1106,7 +1165,7 @@ class WorldStateManagerPlugin:
         )
         
     async def handle_remove_suggestion(self, data):
-        payload = SuggestionPayload(**data)
+        payload = SuggestionPayload.model_validate(data)
         if not payload.proposal_uid:
             await self.world_state_manager.remove_suggestion(payload.id)
         else:
@@ -1128,7 +1187,7 @@ class WorldStateManagerPlugin:
         
         world_state = get_agent("world_state")
         world_state_manager:WorldStateManager = self.scene.world_state_manager
-        payload = GenerateSuggestionPayload(**data)
+        payload = GenerateSuggestionPayload.model_validate(data)
         
         log.debug("Generate suggestions", payload=payload)
         
@@ -1176,4 +1235,11 @@ class WorldStateManagerPlugin:
                 task = asyncio.create_task(task_wrapper())
                 
                 task.add_done_callback(lambda _: asyncio.create_task(self.handle_request_suggestions({})))
-                task.add_done_callback(lambda _: asyncio.create_task(self.signal_operation_done()))
\ No newline at end of file
+                task.add_done_callback(lambda _: asyncio.create_task(self.signal_operation_done()))
+
+
+WorldStateManagerPlugin._handlers = {
+    name[len("handle_") :]: fn
+    for name, fn in vars(WorldStateManagerPlugin).items()
+    if name.startswith("handle_")
+}
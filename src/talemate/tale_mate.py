@@ -1,10 +1,13 @@
 import asyncio
-import json
+import bisect
+import functools
 import os
 import random
 import re
+import secrets
 import traceback
-import uuid
+from collections import OrderedDict
+from types import MappingProxyType
 from typing import Dict, Generator, List, Union
 
 import isodate
@@ -66,6 +69,69 @@ __all__ = [
 
 log = structlog.get_logger("talemate")
 
+# colors randomly assigned to new characters
+CHARACTER_COLORS = (
+    "#F08080",
+    "#FFD700",
+    "#90EE90",
+    "#ADD8E6",
+    "#DDA0DD",
+    "#FFB6C1",
+    "#FAFAD2",
+    "#D3D3D3",
+    "#B0E0E6",
+    "#FFDEAD",
+)
+
+# prefixes of a player choice that trigger a narrator query instead
+# of a conversation
+SENSORY_CHECKS = ("look", "listen", "smell", "taste", "touch", "feel")
+
+# sensory type -> verb used in the narrator query
+SENSORY_ACTION = {
+    "look": "see",
+    "inspect": "see",
+    "examine": "see",
+    "observe": "see",
+    "watch": "see",
+    "view": "see",
+    "see": "see",
+    "listen": "hear",
+    "smell": "smell",
+    "taste": "taste",
+    "touch": "feel",
+    "feel": "feel",
+}
+
+# scene name -> project (directory) name: spaces become dashes, quotes are dropped
+PROJECT_NAME_TABLE = str.maketrans({" ": "-", "'": None})
+
+SCENES_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", "scenes")
+)
+
+# {{user}} placeholder in character cards, replaced by the main character's name
+RE_USER_PLACEHOLDER = re.compile(re.escape("{{user}}"), re.IGNORECASE)
+
+# number of dialogue summaries kept by Scene.summarized_dialogue_history
+SUMMARY_CACHE_SIZE = 16
+
+
+@functools.lru_cache(maxsize=512)
+def _mentioned_names(names: tuple[str, ...], text: str) -> frozenset[str]:
+    """
+    Returns the (lowercased) names that are mentioned in the text as whole words
+
+    Cached as the same text is often scanned for the same set of characters
+    """
+    text = condensed(text.lower())
+    # use regex with word boundaries to match whole words, the substring
+    # check skips the regex for names that do not appear at all
+    return frozenset(
+        name for name in names if name in text and re.search(rf"\b{name}\b", text)
+    )
+
+
 async_signals.register("scene_init")
 async_signals.register("game_loop_start")
 async_signals.register("game_loop")
@@ -73,6 +139,22 @@ async_signals.register("game_loop_actor_iter")
 async_signals.register("game_loop_new_message")
 async_signals.register("player_turn_start")
 
+# signals are global singletons, shared (read-only) by all scenes
+SCENE_SIGNALS = MappingProxyType(
+    {
+        "ai_message": signal("ai_message"),
+        "player_message": signal("player_message"),
+        "history_add": signal("history_add"),
+        "archive_add": signal("archive_add"),
+        "game_loop": async_signals.get("game_loop"),
+        "game_loop_start": async_signals.get("game_loop_start"),
+        "game_loop_actor_iter": async_signals.get("game_loop_actor_iter"),
+        "game_loop_new_message": async_signals.get("game_loop_new_message"),
+        "scene_init": async_signals.get("scene_init"),
+        "player_turn_start": async_signals.get("player_turn_start"),
+    }
+)
+
 
 class ActedAsCharacter(Exception):
     """
@@ -88,6 +170,25 @@ class Character:
     A character for the AI to roleplay, with a name, description, and greeting text.
     """
 
+    __slots__ = (
+        "name",
+        "description",
+        "greeting_text",
+        "example_dialogue",
+        "gender",
+        "color",
+        "is_player",
+        "history_events",
+        "base_attributes",
+        "details",
+        "cover_image",
+        "dialogue_instructions",
+        "memory_dirty",
+        # set when the character is linked to an actor
+        "agent",
+        "actor",
+    )
+
     def __init__(
         self,
         name: str,
@@ -146,12 +247,7 @@ class Character:
             "description": self.description,
         }
 
-        sheet_list = []
-
-        for key, value in sheet.items():
-            sheet_list.append(f"{key}: {value}")
-
-        return "\n".join(sheet_list)
+        return "\n".join(f"{key}: {value}" for key, value in sheet.items())
 
     @property
     def random_dialogue_example(self):
@@ -170,20 +266,7 @@ class Character:
         # if no color provided, chose a random color
 
         if color is None:
-            color = random.choice(
-                [
-                    "#F08080",
-                    "#FFD700",
-                    "#90EE90",
-                    "#ADD8E6",
-                    "#DDA0DD",
-                    "#FFB6C1",
-                    "#FAFAD2",
-                    "#D3D3D3",
-                    "#B0E0E6",
-                    "#FFDEAD",
-                ]
-            )
+            color = random.choice(CHARACTER_COLORS)
         self.color = color
 
     def set_cover_image(self, asset_id: str, initial_only: bool = False):
@@ -200,13 +283,11 @@ class Character:
             "description": self.description,
         }
 
-        sheet_list = []
+        exclude = frozenset(exclude)
 
-        for key, value in sheet.items():
-            if key not in exclude:
-                sheet_list.append(f"{key}: {value}")
-
-        return "\n".join(sheet_list)
+        return "\n".join(
+            f"{key}: {value}" for key, value in sheet.items() if key not in exclude
+        )
 
     def random_dialogue_examples(self, num: int = 3):
         """
@@ -218,17 +299,12 @@ class Character:
         if not self.example_dialogue:
             return []
 
-        # create copy of example_dialogue so we dont modify the original
-
-        examples = self.example_dialogue.copy()
-
-        # shuffle the examples so we get a random order
-
-        random.shuffle(examples)
+        num = min(num, len(self.example_dialogue))
 
-        # now pop examples until we have `num` examples or we run out of examples
+        if num <= 0:
+            return []
 
-        return [examples.pop() for _ in range(min(num, len(examples)))]
+        return random.sample(self.example_dialogue, num)
 
     def filtered_sheet(self, attributes: list[str]):
         """
@@ -237,14 +313,13 @@ class Character:
         Attributes that dont exist will be ignored
         """
 
-        sheet_list = []
-
-        for key, value in self.base_attributes.items():
-            if key.lower() not in attributes:
-                continue
-            sheet_list.append(f"{key}: {value}")
+        attributes = frozenset(attribute.lower() for attribute in attributes)
 
-        return "\n".join(sheet_list)
+        return "\n".join(
+            f"{key}: {value}"
+            for key, value in self.base_attributes.items()
+            if key.lower() in attributes
+        )
 
     def rename(self, new_name: str):
         """
@@ -265,13 +340,22 @@ class Character:
             # or anywhere else so we can just return here
             return
 
+        # only replace whole-word occurrences so renaming "Al" leaves "Alice"
+        # intact (lookarounds instead of \b so names ending in punctuation work)
+        pattern = re.compile(rf"(?<!\w){re.escape(orig_name)}(?!\w)")
+
+        def replace_name(value: str) -> str:
+            if orig_name not in value:
+                return value
+            return pattern.sub(lambda _: new_name, value)
+
         if self.description:
-            self.description = self.description.replace(f"{orig_name}", self.name)
+            self.description = replace_name(self.description)
         for k, v in self.base_attributes.items():
             if isinstance(v, str):
-                self.base_attributes[k] = v.replace(f"{orig_name}", self.name)
+                self.base_attributes[k] = replace_name(v)
         for i, v in list(self.details.items()):
-            self.details[i] = v.replace(f"{orig_name}", self.name)
+            self.details[i] = replace_name(v)
         self.memory_dirty = True
 
     def introduce_main_character(self, character):
@@ -282,28 +366,27 @@ class Character:
         with the main character's name.
         """
 
-        properties = ["description", "greeting_text"]
+        name = character.name
 
-        pattern = re.compile(re.escape("{{user}}"), re.IGNORECASE)
+        def replace_placeholder(value: str) -> str:
+            # the name is inserted literally, backslashes in it are not
+            # treated as group references
+            return RE_USER_PLACEHOLDER.sub(lambda _: name, value)
 
-        for prop in properties:
-            prop_value = getattr(self, prop)
+        if self.description and "{{" in self.description:
+            self.description = replace_placeholder(self.description)
 
-            try:
-                updated_prop_value = pattern.sub(character.name, prop_value)
-            except Exception as e:
-                log.error(
-                    "introduce_main_character",
-                    error=e,
-                    traceback=traceback.format_exc(),
-                )
-                updated_prop_value = prop_value
-            setattr(self, prop, updated_prop_value)
+        if self.greeting_text and "{{" in self.greeting_text:
+            self.greeting_text = replace_placeholder(self.greeting_text)
 
         # also replace in all example dialogue
 
-        for i, dialogue in enumerate(self.example_dialogue):
-            self.example_dialogue[i] = pattern.sub(character.name, dialogue)
+        example_dialogue = self.example_dialogue
+        if example_dialogue and any("{{" in dialogue for dialogue in example_dialogue):
+            self.example_dialogue = [
+                replace_placeholder(dialogue) if "{{" in dialogue else dialogue
+                for dialogue in example_dialogue
+            ]
 
     def update(self, **kwargs):
         """
@@ -320,84 +403,93 @@ class Character:
         Commits this character's details to the memory agent. (vectordb)
         """
 
-        items = []
+        await memory_agent.add_many_iter(self.iter_memory_items())
 
-        if not self.base_attributes or "description" not in self.base_attributes:
-            if not self.description:
-                self.description = ""
-            description_chunks = [
-                chunk.strip() for chunk in self.description.split("\n") if chunk.strip()
-            ]
+        self.memory_dirty = False
 
-            for idx in range(len(description_chunks)):
-                chunk = description_chunks[idx]
-
-                items.append(
-                    {
-                        "text": f"{self.name}: {chunk}",
-                        "id": f"{self.name}.description.{idx}",
-                        "meta": {
-                            "character": self.name,
-                            "attr": "description",
-                            "typ": "base_attribute",
-                        },
-                    }
-                )
+    def iter_memory_items(self) -> Generator[dict, None, None]:
+        """
+        Yields the memory entries for this character's description,
+        attributes, details and history events
 
-        for attr, value in self.base_attributes.items():
-            if attr.startswith("_"):
-                continue
+        Iterates over snapshots of the attribute and detail dicts since the
+        consumer may await between batches
+        """
 
-            if attr.lower() in ["name", "scenario_context", "_prompt", "_template"]:
-                continue
+        name = self.name
 
-            items.append(
-                {
-                    "text": f"{self.name}'s {attr}: {value}",
-                    "id": f"{self.name}.{attr}",
-                    "meta": {
-                        "character": self.name,
-                        "attr": attr,
-                        "typ": "base_attribute",
-                    },
-                }
-            )
+        if not self.base_attributes or "description" not in self.base_attributes:
+            if not self.description:
+                self.description = ""
+            yield from self.iter_description_memory_items()
+
+        for attr, value in list(self.base_attributes.items()):
+            if attr.startswith("_") or attr.lower() in (
+                "name",
+                "scenario_context",
+                "_prompt",
+                "_template",
+            ):
+                continue
 
-        for key, detail in self.details.items():
-            items.append(
-                {
-                    "text": f"{self.name} - {key}: {detail}",
-                    "id": f"{self.name}.{key}",
-                    "meta": {
-                        "character": self.name,
-                        "typ": "details",
-                        "detail": key,
-                    },
-                }
-            )
+            yield {
+                "text": f"{name}'s {attr}: {value}",
+                "id": f"{name}.{attr}",
+                "meta": {
+                    "character": name,
+                    "attr": attr,
+                    "typ": "base_attribute",
+                },
+            }
 
-            # await memory_agent.add(detail, None)
+        for key, detail in list(self.details.items()):
+            yield {
+                "text": f"{name} - {key}: {detail}",
+                "id": f"{name}.{key}",
+                "meta": {
+                    "character": name,
+                    "typ": "details",
+                    "detail": key,
+                },
+            }
 
-        for history_event in self.history_events:
+        for history_event in list(self.history_events):
             if not history_event or not history_event["summary"]:
                 continue
 
-            items.append(
-                {
-                    "text": history_event["summary"],
-                    "meta": {
-                        "character": self.name,
-                        "typ": "history_event",
-                    },
-                }
-            )
+            yield {
+                "text": history_event["summary"],
+                "meta": {
+                    "character": name,
+                    "typ": "history_event",
+                },
+            }
 
-            # await memory_agent.add(history_event["summary"], None)
+    @staticmethod
+    def chunk_description(description: str) -> list[str]:
+        """
+        Splits a description into its non-empty, stripped lines
+        """
+        return [
+            chunk for chunk in (line.strip() for line in description.splitlines()) if chunk
+        ]
 
-        if items:
-            await memory_agent.add_many(items)
+    def iter_description_memory_items(self) -> Generator[dict, None, None]:
+        """
+        Yields one memory entry per description line
+        """
+        name = self.name
 
-        self.memory_dirty = False
+        for idx, chunk in enumerate(self.chunk_description(self.description)):
+            yield {
+                "text": f"{name}: {chunk}",
+                "id": f"{name}.description.{idx}",
+                "meta": {
+                    "character": name,
+                    "attr": "description",
+                    "typ": "base_attribute",
+                },
+            }
 
     async def commit_single_attribute_to_memory(
         self, memory_agent, attribute: str, value: str
@@ -408,12 +500,6 @@ class Character:
 
         items = []
 
-        # remove old attribute if it exists
-
-        await memory_agent.delete(
-            {"character": self.name, "typ": "base_attribute", "attr": attribute}
-        )
-
         self.base_attributes[attribute] = value
 
         items.append(
@@ -430,7 +516,15 @@ class Character:
 
         log.info("commit_single_attribute_to_memory", items=items)
 
-        await memory_agent.add_many(items)
+        # replaces the old attribute if it exists
+        await memory_agent.upsert_many(
+            items,
+            delete_meta={
+                "character": self.name,
+                "typ": "base_attribute",
+                "attr": attribute,
+            },
+        )
 
     async def commit_single_detail_to_memory(
         self, memory_agent, detail: str, value: str
@@ -441,12 +535,6 @@ class Character:
 
         items = []
 
-        # remove old detail if it exists
-
-        await memory_agent.delete(
-            {"character": self.name, "typ": "details", "detail": detail}
-        )
-
         self.details[detail] = value
 
         items.append(
@@ -463,7 +551,11 @@ class Character:
 
         log.info("commit_single_detail_to_memory", items=items)
 
-        await memory_agent.add_many(items)
+        # replaces the old detail if it exists
+        await memory_agent.upsert_many(
+            items,
+            delete_meta={"character": self.name, "typ": "details", "detail": detail},
+        )
 
     async def set_detail(self, name: str, value):
         memory_agent = get_agent("memory")
@@ -512,39 +604,24 @@ class Character:
         memory_agent = get_agent("memory")
         self.description = description
 
-        items = []
-
-        await memory_agent.delete(
-            {"character": self.name, "typ": "base_attribute", "attr": "description"}
+        # replaces the previous description chunks
+        await memory_agent.upsert_many(
+            list(self.iter_description_memory_items()),
+            delete_meta={
+                "character": self.name,
+                "typ": "base_attribute",
+                "attr": "description",
+            },
         )
 
-        description_chunks = [
-            chunk.strip() for chunk in self.description.split("\n") if chunk.strip()
-        ]
-
-        for idx in range(len(description_chunks)):
-            chunk = description_chunks[idx]
-
-            items.append(
-                {
-                    "text": f"{self.name}: {chunk}",
-                    "id": f"{self.name}.description.{idx}",
-                    "meta": {
-                        "character": self.name,
-                        "attr": "description",
-                        "typ": "base_attribute",
-                    },
-                }
-            )
-
-        await memory_agent.add_many(items)
-
 
 class Helper:
     """
     Wrapper for non-conversational agents, such as summarization agents
     """
 
+    __slots__ = ("agent", "options")
+
     def __init__(self, agent: agents.Agent, **options):
         self.agent = agent
         self.options = options
@@ -559,6 +636,8 @@ class Actor:
     links a character to an agent
     """
 
+    __slots__ = ("character", "agent", "scene", "script")
+
     def __init__(self, character: Character, agent: agents.Agent):
         self.character = character
         self.agent = agent
@@ -610,29 +689,12 @@ class Actor:
         editor = self.scene.get_helper("editor").agent
         
         # sensory checks
-        sensory_checks = ["look", "listen", "smell", "taste", "touch", "feel"]
-        
-        sensory_action = {
-            "look": "see",
-            "inspect": "see",
-            "examine": "see",
-            "observe": "see",
-            "watch": "see",
-            "view": "see",
-            "see": "see",
-            "listen": "hear",
-            "smell": "smell",
-            "taste": "taste",
-            "touch": "feel",
-            "feel": "feel",
-        }
-        
-        if choice.lower().startswith(tuple(sensory_checks)):
-            
+        if choice.lower().startswith(SENSORY_CHECKS):
+
             # extract the sensory type
             sensory_type = choice.split(" ", 1)[0].lower()
-            
-            sensory_suffix = sensory_action.get(sensory_type, "experience")
+
+            sensory_suffix = SENSORY_ACTION.get(sensory_type, "experience")
             
             log.debug("generate_from_choice", choice=choice, sensory_checks=True)
             # sensory checks should trigger a narrator query instead of conversation
@@ -673,8 +735,13 @@ class Actor:
 
 
 class Player(Actor):
-    muted = 0
-    ai_controlled = 0
+    __slots__ = ("muted", "ai_controlled")
+
+    def __init__(self, character: Character, agent: agents.Agent):
+        super().__init__(character, agent)
+        # number of turns to skip / have the AI act for the player
+        self.muted = 0
+        self.ai_controlled = 0
 
     async def talk(self, message: Union[str, None] = None):
         """
@@ -778,21 +845,38 @@ class Scene(Emitter):
 
     @classmethod
     def scenes_dir(cls):
-        relative_path = os.path.join(
-            os.path.dirname(os.path.realpath(__file__)),
-            "..",
-            "..",
-            "scenes",
-        )
-        return os.path.abspath(relative_path)
+        return SCENES_DIR
 
     def __init__(self):
         self.actors = []
         self.helpers = []
+        # agent type -> helper, see add_helper
+        self._helpers_by_type = {}
         self.history = []
+        # message id -> index in history, see message_index
+        self._message_index: dict[int, int] = {}
+        # director message source -> message id, see push_history
+        self._director_message_ids: dict[str, int] = {}
+        # (inputs, formatted intro), see get_intro
+        self._intro_cache: tuple[tuple, str] | None = None
+        # pending game_loop_new_message signals, see push_history
+        self._new_message_task: asyncio.Task | None = None
+        # dialogue text -> summary, see summarized_dialogue_history
+        self._summary_cache: OrderedDict[str, str] = OrderedDict()
+        # (ts, human readable scene time), see emit_status
+        self._scene_time_human: tuple[str, str | None] | None = None
+        # serializes scene file writes, see _write_scene_file
+        self._save_lock = asyncio.Lock()
+        # coalesced emit_status calls, see emit_status
+        self._emit_status_pending: bool = False
+        self._emit_status_restored: bool = False
         self.archived_history = []
         self.inactive_characters = {}
         self.layered_history = []
+        # bumped when earlier history is changed in place (edits, layered
+        # history rebuilds), lets caches keyed on the end of the history
+        # notice those changes
+        self.history_revision: int = 0
         self.assets = SceneAssets(scene=self)
         self.description = ""
         self.intro = ""
@@ -809,10 +893,12 @@ class Scene(Emitter):
 
         self.name = ""
         self.filename = ""
-        self.memory_id = str(uuid.uuid4())[:10]
+        self.memory_id = secrets.token_hex(5)
         self.saved_memory_session_id = None
-        self.memory_session_id = str(uuid.uuid4())[:10]
+        self.memory_session_id = secrets.token_hex(5)
         self.restore_from = None
+        # (project name, save directory), see save_dir
+        self._save_dir: tuple[str, str] | None = None
 
         # has scene been saved before?
         self.saved = False
@@ -839,6 +925,8 @@ class Scene(Emitter):
         self.automated_actions = {}
 
         self.active_pins = []
+        # serialized active pins, sent with every status update
+        self._active_pin_dumps = []
         # Add an attribute to store the most recent AI Actor
         self.most_recent_ai_actor = None
         
@@ -851,18 +939,7 @@ class Scene(Emitter):
         # a GenerationCancelled exception
         self.cancel_requested = False
 
-        self.signals = {
-            "ai_message": signal("ai_message"),
-            "player_message": signal("player_message"),
-            "history_add": signal("history_add"),
-            "archive_add": signal("archive_add"),
-            "game_loop": async_signals.get("game_loop"),
-            "game_loop_start": async_signals.get("game_loop_start"),
-            "game_loop_actor_iter": async_signals.get("game_loop_actor_iter"),
-            "game_loop_new_message": async_signals.get("game_loop_new_message"),
-            "scene_init": async_signals.get("scene_init"),
-            "player_turn_start": async_signals.get("player_turn_start"),
-        }
+        self.signals = SCENE_SIGNALS
 
         self.setup_emitter(scene=self)
 
@@ -883,7 +960,7 @@ class Scene(Emitter):
 
     @property
     def has_active_npcs(self):
-        return bool(list(self.get_npc_characters()))
+        return any(not isinstance(actor, Player) for actor in self.actors)
 
     @property
     def log(self):
@@ -899,7 +976,7 @@ class Scene(Emitter):
 
     @property
     def project_name(self) -> str:
-        return self.name.replace(" ", "-").replace("'", "").lower()
+        return self.name.translate(PROJECT_NAME_TABLE).lower()
 
     @property
     def save_files(self) -> list[str]:
@@ -907,18 +984,23 @@ class Scene(Emitter):
         Returns list of save files for the current scene (*.json files
         in the save_dir)
         """
+        save_dir = self.save_dir
+        mtime = os.stat(save_dir).st_mtime_ns
+
+        # cached until the save directory (or its contents) changes
         if hasattr(self, "_save_files"):
-            return self._save_files
-        
-        save_files = []
-        
-        for file in os.listdir(self.save_dir):
-            if file.endswith(".json"):
-                save_files.append(file)
-                
-        self._save_files = sorted(save_files)
-        
-        return self._save_files
+            cached_dir, cached_mtime, save_files = self._save_files
+            if cached_dir == save_dir and cached_mtime == mtime:
+                return save_files
+
+        with os.scandir(save_dir) as entries:
+            save_files = sorted(
+                entry.name for entry in entries if entry.name.endswith(".json")
+            )
+
+        self._save_files = (save_dir, mtime, save_files)
+
+        return save_files
 
     @property
     def num_history_entries(self):
@@ -930,20 +1012,27 @@ class Scene(Emitter):
         # and return the character name attached to it to determine the actor
         # that most recently spoke
 
-        for idx in range(len(self.history) - 1, -1, -1):
-            if isinstance(self.history[idx], CharacterMessage):
-                return self.history[idx].character_name
+        for message in reversed(self.history):
+            if isinstance(message, CharacterMessage):
+                return message.character_name
 
     @property
     def save_dir(self):
+        # cached per project name, the scene can be renamed
+        project_name = self.project_name
+        cached = self._save_dir
+        if cached and cached[0] == project_name:
+            return cached[1]
+
         saves_dir = os.path.join(
             self.scenes_dir(),
-            self.project_name,
+            project_name,
         )
 
         if not os.path.exists(saves_dir):
             os.makedirs(saves_dir)
 
+        self._save_dir = (project_name, saves_dir)
         return saves_dir
 
     @property
@@ -979,11 +1068,11 @@ class Scene(Emitter):
         if not self.writing_style_template:
             return None
         
-        try:
-            group_uid, template_uid = self.writing_style_template.split("__", 1)
-            return self._world_state_templates.find_template(group_uid, template_uid)
-        except ValueError:
+        # stored as "{group_uid}__{template_uid}"
+        group_uid, sep, template_uid = self.writing_style_template.partition("__")
+        if not sep:
             return None
+        return self._world_state_templates.find_template(group_uid, template_uid)
         
 
     def set_description(self, description: str):
@@ -1037,25 +1126,20 @@ class Scene(Emitter):
                 return
 
     def recent_history(self, max_tokens: int = 2048):
-        scene = self
-        history_legnth = len(scene.history)
-        num = 0
-        idx = history_legnth - 1
-        recent_history = []
+        history = self.history
+        idx = len(history)
         total_tokens = 0
 
-        while idx > -1:
-            recent_history.insert(0, scene.history[idx])
-
-            total_tokens += util.count_tokens(scene.history[idx])
-
-            num += 1
+        # walk back from the end until the budget is reached (the message
+        # that reaches it is included), then slice once
+        while idx > 0:
             idx -= 1
+            total_tokens += history[idx].token_count
 
             if total_tokens >= max_tokens:
                 break
 
-        return recent_history
+        return history[idx:]
 
     def push_history(self, messages: list[SceneMessage]):
         """
@@ -1071,18 +1155,19 @@ class Scene(Emitter):
 
         for message in messages:
             if isinstance(message, DirectorMessage):
-                for idx in range(len(self.history) - 1, -1, -1):
-                    if (
-                        isinstance(self.history[idx], DirectorMessage)
-                        and self.history[idx].source == message.source
-                    ):
-                        self.history.pop(idx)
-                        break
+                idx = self._director_message_index(message.source)
+                if idx > -1:
+                    self.history.pop(idx)
+                self._director_message_ids[message.source] = message.id
 
             elif isinstance(message, TimePassageMessage):
                 self.advance_time(message.ts)
 
+        offset = len(self.history)
         self.history.extend(messages)
+        self._message_index.update(
+            (message.id, offset + idx) for idx, message in enumerate(messages)
+        )
         self.signals["history_add"].send(
             events.HistoryEvent(
                 scene=self,
@@ -1091,15 +1176,38 @@ class Scene(Emitter):
             )
         )
 
+        # listeners (e.g. reactive tts) run in the background so adding
+        # to the history does not wait for them
         loop = asyncio.get_event_loop()
+        self._new_message_task = loop.create_task(
+            self._signal_new_messages(messages, self._new_message_task)
+        )
+
+    async def _signal_new_messages(
+        self, messages: list[SceneMessage], previous: asyncio.Task | None
+    ):
+        """
+        Sends the game_loop_new_message signal for each of the messages
+        """
+
+        # wait for the previously pushed messages so listeners receive
+        # messages in history order
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+
         for message in messages:
-            loop.run_until_complete(
-                self.signals["game_loop_new_message"].send(
+            try:
+                await self.signals["game_loop_new_message"].send(
                     events.GameLoopNewMessageEvent(
                         scene=self, event_type="game_loop_new_message", message=message
                     )
                 )
-            )
+            except Exception as e:
+                log.error(
+                    "game_loop_new_message",
+                    error=e,
+                    traceback=traceback.format_exc(),
+                )
 
     def pop_history(
         self,
@@ -1119,21 +1227,28 @@ class Scene(Emitter):
         else:
             iter_range = range(len(self.history))
 
-        to_remove = []
+        to_remove = set()
 
         for idx in iter_range:
             if self.history[idx].typ == typ and (
                 self.history[idx].source == source or source is None
             ):
-                to_remove.append(self.history[idx])
+                to_remove.add(idx)
                 if not all:
                     break
             iterations += 1
             if max_iterations and iterations >= max_iterations:
                 break
 
-        for message in to_remove:
-            self.history.remove(message)
+        if len(to_remove) == 1:
+            del self.history[to_remove.pop()]
+        elif to_remove:
+            # rebuild in place in a single pass
+            self.history[:] = [
+                message
+                for idx, message in enumerate(self.history)
+                if idx not in to_remove
+            ]
 
     def find_message(self, typ: str, source: str, max_iterations: int = 100):
         """
@@ -1152,8 +1267,41 @@ class Scene(Emitter):
         """
         Returns the index of the given message in the history
         """
+        # the history list is also modified outside of the scene (loading,
+        # rerun, forking), so the index is verified on every lookup and
+        # rebuilt when it has gone stale
+        idx = self._message_index.get(message_id)
+        if (
+            idx is None
+            or idx >= len(self.history)
+            or self.history[idx].id != message_id
+        ):
+            self._message_index = {
+                message.id: idx for idx, message in enumerate(self.history)
+            }
+            idx = self._message_index.get(message_id, -1)
+        return idx
+
+    def _director_message_index(self, source: str) -> int:
+        """
+        Returns the index of the director message for the given source
+        in the history, or -1 if there is none
+        """
+        message_id = self._director_message_ids.get(source)
+        if message_id is not None:
+            idx = self.message_index(message_id)
+            if (
+                idx > -1
+                and isinstance(self.history[idx], DirectorMessage)
+                and self.history[idx].source == source
+            ):
+                return idx
+
         for idx in range(len(self.history) - 1, -1, -1):
-            if self.history[idx].id == message_id:
+            if (
+                isinstance(self.history[idx], DirectorMessage)
+                and self.history[idx].source == source
+            ):
                 return idx
         return -1
 
@@ -1161,9 +1309,9 @@ class Scene(Emitter):
         """
         Returns the message in the history with the given id
         """
-        for idx in range(len(self.history) - 1, -1, -1):
-            if self.history[idx].id == message_id:
-                return self.history[idx]
+        idx = self.message_index(message_id)
+        if idx > -1:
+            return self.history[idx]
 
     def last_player_message(self) -> str:
         """
@@ -1242,7 +1390,7 @@ class Scene(Emitter):
         """
 
         if not ignore:
-            ignore = [ReinforcementMessage, DirectorMessage, ContextInvestigationMessage]
+            ignore = (ReinforcementMessage, DirectorMessage, ContextInvestigationMessage)
         else:
             # ignore me also be a list of message type strings (e.g. 'director')
             # convert to class types
@@ -1254,22 +1402,25 @@ class Scene(Emitter):
                     _ignore.append(item)
                 else:
                     raise ValueError("ignore must be a list of strings or SceneMessage types")
-            ignore = _ignore
-
-        collected = []
+            ignore = tuple(_ignore)
 
         segment = (
             self.history[-lines:] if not start else self.history[: start + 1][-lines:]
         )
 
-        for idx in range(len(segment) - 1, -1, -1):
-            if isinstance(segment[idx], tuple(ignore)):
-                continue
-            collected.insert(0, segment[idx])
-            if len(collected) >= lines:
-                break
+        # find where the last `lines` non-ignored messages start
+        start_idx = len(segment)
+        collected = 0
+        while start_idx > 0 and collected < lines:
+            start_idx -= 1
+            if not isinstance(segment[start_idx], ignore):
+                collected += 1
 
-        return "\n".join([message.as_format(as_format) for message in collected])
+        return "\n".join(
+            message.as_format(as_format)
+            for message in segment[start_idx:]
+            if not isinstance(message, ignore)
+        )
 
     def push_archive(self, entry: data_objects.ArchiveEntry):
         """
@@ -1287,45 +1438,78 @@ class Scene(Emitter):
                 ts=entry.ts,
             )
         )
+        # only send the new entry, clients keep their own copy of the list
         emit(
             "archived_history",
             data={
-                "history": [
-                    archived_history for archived_history in self.archived_history
-                ]
+                "entry": self.archived_history[-1],
+                "index": len(self.archived_history) - 1,
             },
         )
 
+    def archive_memory_items(self) -> list[dict]:
+        """
+        Returns the archived history entries as items for MemoryAgent.add_many
+
+        Entries without a timestamp are given one
+        """
+        items = []
+
+        for ah in self.archived_history:
+            ts = ah.get("ts", "PT1S")
+
+            if not ah.get("ts"):
+                ah["ts"] = ts
+
+            meta = {"character": "__narrator__", "typ": "history"}
+            if ts:
+                meta["ts"] = ts
+
+            items.append({"text": ah["text"], "meta": meta})
+
+        return items
+
     def edit_message(self, message_id: int, message: str):
         """
         Finds the message in `history` by its id and will update its contents
         """
 
-        for i, _message in enumerate(self.history):
-            if _message.id == message_id:
-                self.history[i].message = message
-                emit("message_edited", self.history[i], id=message_id)
-                self.log.info("message_edited", message=message, id=message_id)
-                return
+        _message = self.get_message(message_id)
+        if _message is not None:
+            _message.message = message
+            self.history_revision += 1
+            emit("message_edited", _message, id=message_id)
+            self.log.info("message_edited", message=message, id=message_id)
 
     async def add_actor(self, actor: Actor):
         """
         Add an actor to the scene
         """
-        self.actors.append(actor)
         actor.scene = self
 
         if isinstance(actor, Player):
             self.main_character = actor
             actor.character.is_player = True
 
-        for actor in self.actors:
+        # player actors are kept in front of the other actors (in the order
+        # they were added), which is the order the game loop iterates in
+        if actor.character.is_player:
+            idx = 0
+            while idx < len(self.actors) and self.actors[idx].character.is_player:
+                idx += 1
+            self.actors.insert(idx, actor)
+        else:
+            self.actors.append(actor)
+
+        for _actor in self.actors:
             if (
-                not isinstance(actor, Player)
+                not isinstance(_actor, Player)
                 and self.main_character
-                and actor.character.introduce_main_character
+                and _actor.character.introduce_main_character
             ):
-                actor.character.introduce_main_character(self.main_character.character)
+                _actor.character.introduce_main_character(
+                    self.main_character.character
+                )
 
         if not isinstance(actor, Player):
             if not self.context and actor.character.base_attributes.get(
@@ -1378,6 +1562,7 @@ class Scene(Emitter):
         Add a helper to the scene
         """
         self.helpers.append(helper)
+        self._helpers_by_type.setdefault(helper.agent_type, helper)
         helper.agent.connect(self)
 
     def get_helper(self, agent_type):
@@ -1385,9 +1570,7 @@ class Scene(Emitter):
         Returns the helper of the given agent class if it exists
         """
 
-        for helper in self.helpers:
-            if helper.agent_type == agent_type:
-                return helper
+        return self._helpers_by_type.get(agent_type)
 
     def get_character(self, character_name: str, partial: bool = False):
         """
@@ -1400,12 +1583,13 @@ class Scene(Emitter):
         if character_name in self.inactive_characters:
             return self.inactive_characters[character_name]
 
+        character_name = character_name.lower()
+
         for actor in self.actors:
-            if not partial and actor.character.name.lower() == character_name.lower():
+            name = actor.character.name.lower()
+            if not partial and name == character_name:
                 return actor.character
-            elif partial and character_name.lower() in actor.character.name.lower():
-                return actor.character
-            elif partial and actor.character.name.lower() in character_name.lower():
+            elif partial and (character_name in name or name in character_name):
                 return actor.character
 
     def get_player_character(self):
@@ -1419,15 +1603,17 @@ class Scene(Emitter):
                 yield actor.character
 
     def num_npc_characters(self) -> int:
-        return len(list(self.get_npc_characters()))
+        return sum(1 for actor in self.actors if not isinstance(actor, Player))
 
     def parse_character_from_line(self, line: str) -> Character:
         """
         Parse a character from a line of text
         """
 
+        line = line.lower()
+
         for actor in self.actors:
-            if actor.character.name.lower() in line.lower():
+            if actor.character.name.lower() in line:
                 return actor.character
 
     def parse_characters_from_text(self, text: str, exclude_active:bool=False) -> list[Character]:
@@ -1435,20 +1621,23 @@ class Scene(Emitter):
         Parse characters from a block of text
         """
 
-        characters = []
-        text = condensed(text.lower())
-
         # active characters
         if not exclude_active:
-            for actor in self.actors:
-                # use regex with word boundaries to match whole words
-                if re.search(rf"\b{actor.character.name.lower()}\b", text):
-                    characters.append(actor.character)
-                    
+            candidates = [actor.character for actor in self.actors]
+        else:
+            candidates = []
+
         # inactive characters
-        for character in self.inactive_characters.values():
-            if re.search(rf"\b{character.name.lower()}\b", text):
-                characters.append(character)
+        candidates.extend(self.inactive_characters.values())
+
+        names = tuple(character.name.lower() for character in candidates)
+        mentioned = _mentioned_names(names, text)
+
+        characters = [
+            character
+            for character, name in zip(candidates, names)
+            if name in mentioned
+        ]
 
         return sorted(characters, key=lambda x: len(x.name))
 
@@ -1487,20 +1676,40 @@ class Scene(Emitter):
         
         try:
             player_name = self.get_player_character().name
-            intro = intro.replace("{{user}}", player_name).replace(
-                "{{char}}", player_name
-            )
         except AttributeError:
+            # without a player character the scene intro is used as is
             intro = self.intro
+            player_name = None
             
         editor = self.get_helper("editor").agent
-            
-        if editor.fix_exposition_enabled and editor.fix_exposition_narrator:
-            if '"' not in intro and "*" not in intro:
-                intro = f"*{intro}*"
-            intro = editor.fix_exposition_in_text(intro)
+        fix_exposition = editor.fix_exposition_enabled and editor.fix_exposition_narrator
+
+        # the intro is requested for every context history, only re-format
+        # it when one of its inputs has changed
+        key = (
+            intro,
+            player_name,
+            fix_exposition,
+            editor.fix_exposition_formatting if fix_exposition else None,
+        )
+        cached = self._intro_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
 
-        return intro
+        if player_name is not None and intro is not None:
+            formatted = intro.replace("{{user}}", player_name).replace(
+                "{{char}}", player_name
+            )
+        else:
+            formatted = intro
+
+        if fix_exposition:
+            if '"' not in formatted and "*" not in formatted:
+                formatted = f"*{formatted}*"
+            formatted = editor.fix_exposition_in_text(formatted)
+
+        self._intro_cache = (key, formatted)
+        return formatted
 
     def history_length(self):
         """
@@ -1514,6 +1723,10 @@ class Scene(Emitter):
         If no message_type or source is given, will return the total number of messages in the history
         """
 
+        # the dialogue templates call this without filters on every prompt
+        if not message_type and not source:
+            return len(self.history)
+
         count = 0
 
         for message in self.history:
@@ -1555,7 +1768,20 @@ class Scene(Emitter):
         if not summarizer:
             return ""
 
-        summary = await summarizer.agent.summarize("\n".join(history))
+        text = "\n".join(history)
+
+        # the summary is reused as long as the summarized text is unchanged,
+        # which also covers edited or removed messages
+        summary = self._summary_cache.get(text)
+        if summary is not None:
+            self._summary_cache.move_to_end(text)
+            return summary
+
+        summary = await summarizer.agent.summarize(text)
+
+        self._summary_cache[text] = summary
+        if len(self._summary_cache) > SUMMARY_CACHE_SIZE:
+            self._summary_cache.popitem(last=False)
 
         return summary
 
@@ -1566,6 +1792,12 @@ class Scene(Emitter):
         parts_context = []
         parts_dialogue = []
 
+        # token count of each entry in parts_context and the running
+        # token totals of parts_context and parts_dialogue
+        context_entry_tokens = []
+        context_tokens = 0
+        dialogue_tokens = 0
+
         budget_context = int(0.5 * budget)
         budget_dialogue = int(0.5 * budget)
         
@@ -1606,12 +1838,15 @@ class Scene(Emitter):
                     log.error("context_history", error=e, traceback=traceback.format_exc())
                     text = archive_history_entry["text"]
 
-                if count_tokens(parts_context) + count_tokens(text) > budget_context:
+                if context_tokens + count_tokens(text) > budget_context:
                     break
                 
                 text = condensed(text)
                 
+                text_tokens = count_tokens(text)
                 parts_context.insert(0, text)
+                context_entry_tokens.insert(0, text_tokens)
+                context_tokens += text_tokens
                     
         else:
             
@@ -1651,7 +1886,10 @@ class Scene(Emitter):
                         text = f"### Chapter {chapter_number}\n{text}"
                         chapter_numbers.append(chapter_number)
                     
+                    text_tokens = count_tokens(text)
                     parts_context.append(text)
+                    context_entry_tokens.append(text_tokens)
+                    context_tokens += text_tokens
                     
                     k += 1
                     
@@ -1668,7 +1906,11 @@ class Scene(Emitter):
                 # open a new section for the current scene
                 
                 if chapter_labels:
-                    parts_context.append("### Current\n")
+                    text = "### Current\n"
+                    text_tokens = count_tokens(text)
+                    parts_context.append(text)
+                    context_entry_tokens.append(text_tokens)
+                    context_tokens += text_tokens
                 
                 for archive_history_entry in self.archived_history[base_layer_start:]:
                     time_message = util.iso8601_diff_to_human(
@@ -1679,15 +1921,21 @@ class Scene(Emitter):
                     
                     text = condensed(text)
                     
+                    text_tokens = count_tokens(text)
                     parts_context.append(text)
+                    context_entry_tokens.append(text_tokens)
+                    context_tokens += text_tokens
 
                     i += 1
 
         # log.warn if parts_context token count > budget_context
-        if count_tokens(parts_context) > budget_context:
+        if context_tokens > budget_context:
             # chop off the top until it fits
-            while count_tokens(parts_context) > budget_context:
-                parts_context.pop(0)
+            cut = 0
+            while context_tokens > budget_context and cut < len(parts_context):
+                context_tokens -= context_entry_tokens[cut]
+                cut += 1
+            parts_context = parts_context[cut:]
 
         # DIALOGUE
         try:
@@ -1738,19 +1986,26 @@ class Scene(Emitter):
                 continue
 
 
-            if count_tokens(parts_dialogue) + count_tokens(message) > budget_dialogue:
+            # the formatted message is what ends up in the context, so
+            # that is what counts against the budget
+            formatted = message.as_format(
+                conversation_format, mode=actor_direction_mode
+            )
+            message_tokens = message.count_tokens_for(formatted)
+
+            if dialogue_tokens + message_tokens > budget_dialogue:
                 break
             
-            parts_dialogue.insert(
-                0, 
-                message.as_format(conversation_format, mode=actor_direction_mode)
-            )
+            # collected newest first, reversed once below
+            parts_dialogue.append(formatted)
+            dialogue_tokens += message_tokens
             
             if isinstance(message, CharacterMessage):
                 dialogue_messages_collected += 1
                     
+        parts_dialogue.reverse()
             
-        if count_tokens(parts_context + parts_dialogue) < 1024:
+        if context_tokens + dialogue_tokens < 1024:
             intro = self.get_intro()
             if intro:
                 parts_context.insert(0, intro)
@@ -1897,7 +2152,7 @@ class Scene(Emitter):
         emit("director", new_message, character=character)
 
     async def _rerun_character_message(self, message):
-        character_name = message.split(":")[0]
+        character_name = message.character_name
 
         character = self.get_character(character_name)
 
@@ -1975,17 +2230,15 @@ class Scene(Emitter):
         Delete a message from the history
         """
         log.debug(f"Deleting message {message_id}")
-        for i, message in enumerate(self.history):
-            if message.id == message_id:
-                self.history.pop(i)
-                log.info(f"Deleted message {message_id}")
-                emit("remove_message", "", id=message_id)
+        idx = self.message_index(message_id)
+        if idx > -1:
+            message = self.history.pop(idx)
+            log.info(f"Deleted message {message_id}")
+            emit("remove_message", "", id=message_id)
 
-                if isinstance(message, TimePassageMessage):
-                    self.sync_time()
-                    self.emit_status()
-
-                break
+            if isinstance(message, TimePassageMessage):
+                self.sync_time()
+                self.emit_status()
 
     def can_auto_save(self):
         """
@@ -1995,7 +2248,47 @@ class Scene(Emitter):
         return self.filename and not self.immutable_save
 
     def emit_status(self, restored: bool = False):
+        """
+        Emits the scene status to the client
+
+        Calls made while the event loop is running are coalesced into a
+        single emission on the next loop iteration
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._emit_status(restored)
+            return
+
+        self._emit_status_restored = self._emit_status_restored or restored
+
+        if self._emit_status_pending:
+            return
+
+        self._emit_status_pending = True
+        loop.call_soon(self._flush_emit_status)
+
+    def _flush_emit_status(self):
+        restored = self._emit_status_restored
+        self._emit_status_pending = False
+        self._emit_status_restored = False
+        try:
+            self._emit_status(restored)
+        except Exception as e:
+            log.exception("emit_status", error=e)
+
+    def _emit_status(self, restored: bool = False):
         player_character = self.get_player_character()
+
+        # only re-format the scene time when it has changed
+        cached = self._scene_time_human
+        if cached is None or cached[0] != self.ts:
+            cached = self._scene_time_human = (
+                self.ts,
+                util.iso8601_duration_to_human(self.ts, suffix="") if self.ts else None,
+            )
+        scene_time = cached[1]
+
         emit(
             "scene_status",
             self.name,
@@ -2021,18 +2314,14 @@ class Scene(Emitter):
                     character.name: character.color
                     for character in self.get_characters()
                 },
-                "scene_time": (
-                    util.iso8601_duration_to_human(self.ts, suffix="")
-                    if self.ts
-                    else None
-                ),
+                "scene_time": scene_time,
                 "saved": self.saved,
                 "auto_save": self.auto_save,
                 "auto_progress": self.auto_progress,
                 "can_auto_save": self.can_auto_save(),
                 "game_state": self.game_state.model_dump(),
                 "agent_state": self.agent_state,
-                "active_pins": [pin.model_dump() for pin in self.active_pins],
+                "active_pins": self._active_pin_dumps,
                 "experimental": self.experimental,
                 "immutable_save": self.immutable_save,
                 "description": self.description,
@@ -2046,7 +2335,7 @@ class Scene(Emitter):
             "scene_status",
             scene=self.name,
             scene_time=self.ts,
-            human_ts=util.iso8601_duration_to_human(self.ts, suffix="") if self.ts else None,
+            human_ts=scene_time,
             saved=self.saved,
         )
 
@@ -2102,9 +2391,17 @@ class Scene(Emitter):
         else:
             end = 0
 
+        # sum the time passage durations and format the result once instead
+        # of round-tripping the scene time through a string per message
+        duration = None
         for message in self.history[end:]:
             if isinstance(message, TimePassageMessage):
-                self.advance_time(message.ts)
+                if duration is None:
+                    duration = isodate.parse_duration(self.ts)
+                duration += isodate.parse_duration(message.ts)
+
+        if duration is not None:
+            self.ts = isodate.duration_isoformat(duration)
 
         self.log.info("sync_time", ts=self.ts)
 
@@ -2162,6 +2459,9 @@ class Scene(Emitter):
             self.ts = ending_time
             return    
             
+        # history indexes of the time jumps (ascending)
+        jump_indexes = [jump_idx for jump_idx, _ in cumulative_time_jumps]
+
         # apply time jumps to the archived history
         ts = starting_time
         for _, entry in enumerate(self.archived_history):
@@ -2173,12 +2473,8 @@ class Scene(Emitter):
             # index to time_jumps (find the closest time jump that is
             # smaller than entry["end"])
             
-            best_ts = None
-            for jump_idx, jump_ts in cumulative_time_jumps:
-                if jump_idx < entry["end"]:
-                    best_ts = jump_ts
-                else:
-                    break
+            num_jumps = bisect.bisect_left(jump_indexes, entry["end"])
+            best_ts = cumulative_time_jumps[num_jumps - 1][1] if num_jumps else None
             
             if best_ts:
                 entry["ts"] = best_ts
@@ -2218,6 +2514,9 @@ class Scene(Emitter):
 
         _active_pins = await self.world_state_manager.get_pins(active=True)
         self.active_pins = list(_active_pins.pins.values())
+        # pins are re-fetched whenever they change, so they only need to be
+        # serialized once per load
+        self._active_pin_dumps = [pin.model_dump() for pin in self.active_pins]
 
     async def start(self):
         """
@@ -2254,6 +2553,40 @@ class Scene(Emitter):
         if not memory.db:
             await memory.set_db()
 
+    def _emit_backscroll(self, max_backscroll: int):
+        """
+        Emits the last `max_backscroll` history messages to the client,
+        character messages are emitted for their actor
+        """
+
+        # walk the tail of the history by index so that no copy of it
+        # has to be made
+        history = self.history
+        start = max(0, len(history) - max_backscroll)
+
+        # lowercased name -> actor, first actor wins (same as get_character)
+        actors_by_name = {}
+        for actor in self.actors:
+            if actor.character:
+                actors_by_name.setdefault(actor.character.name.lower(), actor)
+
+        for idx in range(start, len(history)):
+            item = history[idx]
+            char_name = item.message.partition(":")[0]
+
+            if char_name in self.inactive_characters:
+                actor = getattr(self.inactive_characters[char_name], "actor", None)
+            else:
+                actor = actors_by_name.get(char_name.lower())
+
+            if actor is None:
+                # If the character is not an actor, then it is the narrator
+                emit(item.typ, item)
+                continue
+            emit("character", item, character=actor.character)
+            if not actor.character.is_player:
+                self.most_recent_ai_actor = actor
+
     async def emit_history(self):
         emit("clear_screen", "")
 
@@ -2262,7 +2595,8 @@ class Scene(Emitter):
         await self.signals["scene_init"].send(
             events.SceneStateEvent(scene=self, event_type="scene_init")
         )
-        self.narrator_message(self.get_intro())
+        intro = self.get_intro()
+        self.narrator_message(intro)
 
         for actor in self.actors:
             if (
@@ -2273,7 +2607,7 @@ class Scene(Emitter):
 
             if (
                 actor.character.greeting_text
-                and actor.character.greeting_text != self.get_intro()
+                and actor.character.greeting_text != intro
             ):
                 item = f"{actor.character.name}: {actor.character.greeting_text}"
                 emit("character", item, character=actor.character)
@@ -2284,17 +2618,7 @@ class Scene(Emitter):
         
         # history is not empty, so we are continuing a scene
         # need to emit current messages
-        for item in self.history[-max_backscroll:]:
-            char_name = item.split(":")[0]
-            try:
-                actor = self.get_character(char_name).actor
-            except AttributeError:
-                # If the character is not an actor, then it is the narrator
-                emit(item.typ, item)
-                continue
-            emit("character", item, character=actor.character)
-            if not actor.character.is_player:
-                self.most_recent_ai_actor = actor
+        self._emit_backscroll(max_backscroll)
 
     async def _run_game_loop(self, init: bool = True):
 
@@ -2308,7 +2632,8 @@ class Scene(Emitter):
             await self.signals["scene_init"].send(
                 events.SceneStateEvent(scene=self, event_type="scene_init")
             )
-            self.narrator_message(self.get_intro())
+            intro = self.get_intro()
+            self.narrator_message(intro)
 
             for actor in self.actors:
                 if (
@@ -2321,7 +2646,7 @@ class Scene(Emitter):
 
                 if (
                     actor.character.greeting_text
-                    and self.get_intro(actor.character.greeting_text) != self.get_intro()
+                    and self.get_intro(actor.character.greeting_text) != intro
                 ):
                     item = f"{actor.character.name}: {actor.character.greeting_text}"
                     emit("character", item, character=actor.character)
@@ -2336,24 +2661,11 @@ class Scene(Emitter):
         if init and self.history:
             # history is not empty, so we are continuing a scene
             # need to emit current messages
-            for item in self.history[-max_backscroll:]:
-                char_name = item.split(":")[0]
-                try:
-                    actor = self.get_character(char_name).actor
-                except AttributeError:
-                    # If the character is not an actor, then it is the narrator
-                    emit(item.typ, item)
-                    continue
-                emit("character", item, character=actor.character)
-                if not actor.character.is_player:
-                    self.most_recent_ai_actor = actor
+            self._emit_backscroll(max_backscroll)
             self.world_state.emit()
         elif init:
             await self.world_state.request_update(initial_only=True)
 
-        # sort self.actors by actor.character.is_player, making is_player the first element
-        self.actors.sort(key=lambda x: x.character.is_player, reverse=True)
-
         self.active_actor = None
         self.next_actor = None
         signal_game_loop = True
@@ -2547,7 +2859,7 @@ class Scene(Emitter):
 
     def set_new_memory_session_id(self):
         self.saved_memory_session_id = self.memory_session_id
-        self.memory_session_id = str(uuid.uuid4())[:10]
+        self.memory_session_id = secrets.token_hex(5)
         log.debug(
             "set_new_memory_session_id",
             saved_memory_session_id=self.saved_memory_session_id,
@@ -2595,7 +2907,7 @@ class Scene(Emitter):
             self.immutable_save = False
             memory_agent = self.get_helper("memory").agent
             memory_agent.close_db(self)
-            self.memory_id = str(uuid.uuid4())[:10]
+            self.memory_id = secrets.token_hex(5)
             await self.commit_to_memory()
 
         self.set_new_memory_session_id()
@@ -2613,8 +2925,7 @@ class Scene(Emitter):
         if not auto:
             emit("status", status="success", message="Saved scene")
 
-        with open(filepath, "w") as f:
-            json.dump(scene_data, f, indent=2, cls=save.SceneEncoder)
+        await self._write_scene_file(filepath, scene_data)
 
         self.saved = True
 
@@ -2636,12 +2947,23 @@ class Scene(Emitter):
         
         serialized = self.serialize
         serialized["immutable_save"] = True
-        serialized["memory_session_id"] = str(uuid.uuid4())[:10]
+        serialized["memory_session_id"] = secrets.token_hex(5)
         serialized["saved_memory_session_id"] = self.memory_session_id
-        serialized["memory_id"] = str(uuid.uuid4())[:10]
+        serialized["memory_id"] = secrets.token_hex(5)
         filepath = os.path.join(self.save_dir, filename)
-        with open(filepath, "w") as f:
-            json.dump(serialized, f, indent=2, cls=save.SceneEncoder)
+        await self._write_scene_file(filepath, serialized)
+
+    async def _write_scene_file(self, filepath: str, scene_data: dict):
+        """
+        Encodes the serialized scene on the event loop (so it can not change
+        while it is being encoded) and writes it in a worker thread
+
+        Writes are serialized per scene so overlapping saves (e.g., an auto
+        save during a manual save) can not interleave
+        """
+        async with self._save_lock:
+            scene_json = save.dumps_scene(scene_data)
+            await asyncio.to_thread(save.write_scene_file, filepath, scene_json)
 
     async def add_to_recent_scenes(self):
         log.debug("add_to_recent_scenes", filename=self.filename)
@@ -2656,27 +2978,24 @@ class Scene(Emitter):
         memory.drop_db()
         await memory.set_db()
 
-        for ah in self.archived_history:
-            ts = ah.get("ts", "PT1S")
+        # archived history is added in a single batch
+        archive_items = self.archive_memory_items()
+        if archive_items:
+            await memory.add_many(archive_items)
 
-            if not ah.get("ts"):
-                ah["ts"] = ts
-
-            self.signals["archive_add"].send(
-                events.ArchiveEvent(
-                    scene=self, event_type="archive_add", text=ah["text"], ts=ts
-                )
-            )
-            await asyncio.sleep(0)
-
-        for character in self.characters:
-            await character.commit_to_memory(memory)
+        # characters are committed concurrently, each add_many runs in
+        # the executor
+        await asyncio.gather(
+            *[character.commit_to_memory(memory) for character in self.characters]
+        )
 
         await self.world_state.commit_to_memory(memory)
 
     def reset(self):
         # remove messages
         self.history = []
+        self._message_index = {}
+        self._director_message_ids = {}
 
         # clear out archived history, but keep pre-established history
         self.archived_history = [
@@ -2696,7 +3015,7 @@ class Scene(Emitter):
     async def reset_memory(self):
         memory_agent = self.get_helper("memory").agent
         memory_agent.close_db(self)
-        self.memory_id = str(uuid.uuid4())[:10]
+        self.memory_id = secrets.token_hex(5)
         await self.commit_to_memory()
 
         self.set_new_memory_session_id()
@@ -2742,6 +3061,13 @@ class Scene(Emitter):
             self.log.error("restore", error=e, traceback=traceback.format_exc())
 
     def sync_restore(self, *args, **kwargs):
+        """
+        Blocking version of restore
+
+        Re-enters the scene's event loop through nest_asyncio, which also
+        works while the loop is running. Scheduling restore on the loop and
+        blocking on its result from the loop thread would deadlock instead.
+        """
         loop = asyncio.get_event_loop()
         loop.run_until_complete(self.restore())
 
@@ -2780,7 +3106,7 @@ class Scene(Emitter):
 
     @property
     def json(self):
-        return json.dumps(self.serialize, indent=2, cls=save.SceneEncoder)
+        return save.dumps_scene(self.serialize)
 
 
     def interrupt(self):
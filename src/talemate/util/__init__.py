@@ -1,6 +1,5 @@
-import base64
 import datetime
-import io
+import functools
 import json
 import re
 import struct
@@ -16,6 +15,7 @@ from PIL import Image
 from thefuzz import fuzz
 
 from talemate.scene_message import SceneMessage
+from talemate.util.b64 import b64decode
 from talemate.util.dialogue import *
 from talemate.util.prompt import *
 from talemate.util.response import *
@@ -27,6 +27,15 @@ init(autoreset=True)
 
 TIKTOKEN_ENCODING = tiktoken.encoding_for_model("gpt-4-turbo")
 
+# lists with at least this many strings are tokenized with tiktoken's
+# (threaded) batch encoder, below that the thread pool is not worth it
+COUNT_TOKENS_BATCH_MIN = 32
+
+SENTENCE_ENDINGS = (".", "!", "?", '"', "*")
+
+RE_LEADING_NON_ALPHA = re.compile(r"^[^a-zA-Z]*")
+RE_MULTIPLE_SPACES = re.compile(r" +")
+
 
 def fix_unquoted_keys(s):
     unquoted_key_pattern = r"(?<!\\)(?:(?<=\{)|(?<=,))\s*(\w+)\s*:"
@@ -203,7 +212,7 @@ def read_metadata_from_png_text(image_path: str) -> dict:
         if chunk_type == b"tEXt":
             keyword, text_data = chunk_data.split(b"\x00", 1)
             if keyword == b"chara":
-                return json.loads(base64.b64decode(text_data).decode("utf-8"))
+                return json.loads(b64decode(text_data).decode("utf-8"))
         offset += 12 + length
 
     raise ValueError("No character metadata found.")
@@ -218,12 +227,12 @@ def chara_read(img_url, input_format=None):
     else:
         format = input_format
 
-    with open(img_url, "rb") as image_file:
-        image_data = image_file.read()
-        image = Image.open(io.BytesIO(image_data))
-
-    exif_data = image.getexif()
     if format == "webp":
+        # exif is only needed for webp, png cards are read from the
+        # image info below
+        with Image.open(img_url) as image:
+            exif_data = image.getexif()
+
         try:
             if 37510 in exif_data:
                 try:
@@ -252,12 +261,12 @@ def chara_read(img_url, input_format=None):
             img_data = img.info
 
             if "chara" in img_data:
-                base64_decoded_data = base64.b64decode(img_data["chara"]).decode(
+                base64_decoded_data = b64decode(img_data["chara"]).decode(
                     "utf-8"
                 )
                 return json.loads(base64_decoded_data)
             if "comment" in img_data:
-                base64_decoded_data = base64.b64decode(img_data["comment"]).decode(
+                base64_decoded_data = b64decode(img_data["comment"]).decode(
                     "utf-8"
                 )
                 return base64_decoded_data
@@ -282,10 +291,17 @@ def chara_read(img_url, input_format=None):
 
 def count_tokens(source):
     if isinstance(source, list):
-        t = 0
-        for s in source:
-            t += count_tokens(s)
-    elif isinstance(source, (str, SceneMessage)):
+        strings = [s for s in source if isinstance(s, str)]
+        if len(strings) >= COUNT_TOKENS_BATCH_MIN:
+            t = sum(len(tokens) for tokens in TIKTOKEN_ENCODING.encode_batch(strings))
+            t += sum(count_tokens(s) for s in source if not isinstance(s, str))
+        else:
+            t = 0
+            for s in source:
+                t += count_tokens(s)
+    elif isinstance(source, SceneMessage):
+        t = source.token_count
+    elif isinstance(source, str):
         # FIXME: there is currently no good way to determine
         # the model loaded in the client, so we are using the
         # TIKTOKEN_ENCODING for now.
@@ -342,13 +358,12 @@ def strip_partial_sentences(text: str) -> str:
     Returns:
         str: The cleaned text.
     """
-    sentence_endings = [".", "!", "?", '"', "*"]
+    # find the last sentence ending in `text`
 
-    # loop backwards through `text` until a sentence ending is found
+    i = max(map(text.rfind, SENTENCE_ENDINGS))
 
-    for i in range(len(text) - 1, -1, -1):
-        if text[i] in sentence_endings:
-            return remove_trailing_markers(text[: i + 1])
+    if i != -1:
+        return remove_trailing_markers(text[: i + 1])
 
     return text
 
@@ -397,14 +412,14 @@ def clean_paragraph(paragraph: str) -> str:
         kept_text = split_paragraph[0]
 
     # Remove all characters that aren't a-zA-Z from the beginning of the kept text
-    cleaned_text = re.sub(r"^[^a-zA-Z]*", "", kept_text)
+    cleaned_text = RE_LEADING_NON_ALPHA.sub("", kept_text)
 
     return cleaned_text
 
 
 def clean_message(message: str) -> str:
     message = message.strip()
-    message = re.sub(r" +", " ", message)
+    message = RE_MULTIPLE_SPACES.sub(" ", message)
     return message
 
 
@@ -645,6 +660,8 @@ def iso8601_duration_to_human(iso_duration, suffix: str = " ago",
     return f"{human_str}{suffix}"
 
 
+# context history renders the same (entry ts, scene ts) pairs on every call
+@functools.lru_cache(maxsize=4096)
 def iso8601_diff_to_human(start, end, flatten: bool = True):
     if not start or not end:
         return ""
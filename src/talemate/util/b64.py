@@ -0,0 +1,16 @@
+"""
+Base64 helpers used for image, audio and character card payloads
+
+Uses pybase64 (SIMD accelerated) when it is installed and falls back
+to the standard library otherwise.
+"""
+
+try:
+    from pybase64 import b64decode, b64encode
+except ImportError:
+    from base64 import b64decode, b64encode
+
+__all__ = [
+    "b64decode",
+    "b64encode",
+]
@@ -0,0 +1,45 @@
+"""
+JSON serialization used for scene files and websocket messages
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise, or for anything orjson can not encode (e.g. integers larger
+than 64 bit).
+
+Unlike the json module, orjson writes NaN and Infinity as null.
+"""
+
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = [
+    "dumps",
+]
+
+
+def dumps(
+    obj: Any,
+    indent: bool = False,
+    default: Callable[[Any], Any] | None = None,
+    cls: type[json.JSONEncoder] | None = None,
+) -> str:
+    """
+    Serializes `obj` to a json string
+
+    `default` is used by orjson and `cls` by the json fallback, they should
+    encode the same types. Dataclasses are passed through to `default`
+    rather than being serialized by orjson directly.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2 if indent else None, cls=cls)
@@ -547,9 +547,10 @@ class WorldStateManager:
         exists = self.template_collection.find(group.uid)
         if not exists:
             self.template_collection.groups.append(group)
-            group.save()
+            await group.asave()
         else:
-            exists.update(group)
+            exists.update(group, save=False)
+            await exists.asave()
 
     async def remove_template_group(self, group: world_state_templates.Group):
         """
@@ -568,7 +569,8 @@ class WorldStateManager:
             If the template is set to auto-create, it will be applied immediately.
         """
         group = self.template_collection.find(template.group)
-        group.update_template(template)
+        group.update_template(template, save=False)
+        await group.asave()
         if getattr(template, "auto_create", False):
             await self.auto_apply_template(template)
 
@@ -577,7 +579,8 @@ class WorldStateManager:
         Removes a specific state reinforcement template from scene configuration.
         """
         group = self.template_collection.find(template.group)
-        group.delete_template(template)
+        group.delete_template(template, save=False)
+        await group.asave()
 
     async def apply_all_auto_create_templates(self):
         """
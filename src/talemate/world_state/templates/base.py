@@ -1,5 +1,8 @@
+import asyncio
 import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum
 from typing import TYPE_CHECKING, Any, ClassVar, Dict, Optional, TypeVar, Union
 
@@ -8,6 +11,14 @@ import structlog
 import yaml
 from typing_extensions import Annotated
 
+# libyaml bindings are used when pyyaml was built with them
+try:
+    from yaml import CDumper as YAMLDumper
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:
+    from yaml import Dumper as YAMLDumper
+    from yaml import SafeLoader as YAMLLoader
+
 if TYPE_CHECKING:
     from talemate.config import Config
     from talemate.tale_mate import Scene
@@ -55,9 +66,10 @@ def validate_template(
     info: pydantic.ValidationInfo,
 ):
     if isinstance(v, dict):
-        if v["template_type"] not in MODELS:
+        model = MODELS.get(v["template_type"])
+        if model is None:
             raise ValueError(f"Template type {v['template_type']} is not registered")
-        return MODELS[v["template_type"]](**v)
+        return model.model_validate(v)
     elif isinstance(v, Template):
         if v.template_type not in MODELS:
             raise ValueError(f"Template type {v.template_type} is not registered")
@@ -109,6 +121,23 @@ class Template(pydantic.BaseModel):
         return value.format(**kwargs)
 
 
+def _write_group_file(path: str, group_data: dict):
+    # written to a per-thread temp file and moved into place so that
+    # concurrent saves of the same group can not interleave their writes
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            yaml.dump(group_data, f, Dumper=YAMLDumper, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    log.debug("Worldstate template group saved", path=path)
+
+
 TemplateType = TypeVar("TemplateType", bound=Template)
 AnnotatedTemplate = Annotated[TemplateType, pydantic.WrapValidator(validate_template)]
 
@@ -124,7 +153,7 @@ class Group(pydantic.BaseModel):
     @classmethod
     def load(cls, path: str) -> "Group":
         with open(path, "r") as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YAMLLoader)
             data.pop("path", None)
             return cls(path=path, **data)
 
@@ -134,7 +163,18 @@ class Group(pydantic.BaseModel):
         return f"{cleaned_name}.yaml"
 
     def save(self, path: str = TEMPLATE_PATH):
+        _write_group_file(*self._save_data(path))
 
+    async def asave(self, path: str = TEMPLATE_PATH):
+        """
+        Same as save, but the yaml file is written from a worker thread
+
+        The group is dumped on the calling thread so that it can not change
+        while it is being written
+        """
+        await asyncio.to_thread(_write_group_file, *self._save_data(path))
+
+    def _save_data(self, path: str) -> tuple[str, dict]:
         if not self.path:
             path = os.path.join(path, self.filename)
         else:
@@ -144,11 +184,9 @@ class Group(pydantic.BaseModel):
         for template in self.templates.values():
             template.group = self.uid
 
-        with open(path, "w") as f:
-            group_data = self.model_dump()
-            group_data.pop("path", None)
-            yaml.dump(group_data, f, sort_keys=True)
-        log.debug("Worldstate template group saved", path=path)
+        group_data = self.model_dump()
+        group_data.pop("path", None)
+        return path, group_data
 
     def diff(self, group: "Group") -> "Group":
         """
@@ -212,6 +250,12 @@ class Group(pydantic.BaseModel):
             self.save()
 
     def find(self, uid: str) -> Template | None:
+        # templates are keyed by their uid
+        template = self.templates.get(uid)
+        if template is not None and template.uid == uid:
+            return template
+
+        # hand edited group files may use other keys
         for template in self.templates.values():
             if template.uid == uid:
                 return template
@@ -244,16 +288,22 @@ class Collection(pydantic.BaseModel):
         into a new collection
         """
 
-        groups = []
+        paths = []
 
         for root, _, files in os.walk(path):
             # loop through root and directories
-            # and load any .yaml files as groups
+            # and collect any .yaml files as groups
 
             for file in files:
                 if file.endswith(".yaml"):
-                    group = Group.load(os.path.join(root, file))
-                    groups.append(group)
+                    paths.append(os.path.join(root, file))
+
+        if len(paths) <= 1:
+            return cls(groups=[Group.load(group_path) for group_path in paths])
+
+        # groups are independent files, read and parse them in parallel
+        with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+            groups = list(executor.map(Group.load, paths))
 
         return cls(groups=groups)
 
@@ -275,12 +325,19 @@ class Collection(pydantic.BaseModel):
 
         config_templates = config.game.world_state.templates.model_dump()
 
+        # list the template directory once instead of checking every
+        # legacy group file individually
+        if check_if_exists and os.path.isdir(TEMPLATE_PATH_TALEMATE):
+            existing = set(os.listdir(TEMPLATE_PATH_TALEMATE))
+        else:
+            existing = set()
+
         for template_type, templates in config_templates.items():
 
             name = f"legacy-{template_type.replace('_', '-')}s"
 
             if check_if_exists:
-                if os.path.exists(os.path.join(TEMPLATE_PATH_TALEMATE, f"{name}.yaml")):
+                if f"{name}.yaml" in existing:
                     log.debug(
                         "template transfer from legacy config",
                         template_type=template_type,
@@ -320,43 +377,46 @@ class Collection(pydantic.BaseModel):
         merged templates from all groups
         """
 
-        templates = {}
+        types = set(types) if types else None
 
-        for group in self.groups:
-            for template_id, template in group.templates.items():
+        templates = {
+            f"{group.uid}__{template_id}": template
+            for group in self.groups
+            for template_id, template in group.templates.items()
+            if types is None or template.template_type in types
+        }
 
-                if types and template.template_type not in types:
-                    continue
-
-                uid = f"{group.uid}__{template_id}"
-                templates[uid] = template
-
-        return FlatCollection(templates=templates)
+        # the templates are validated already
+        return FlatCollection.model_construct(templates=templates)
 
     def typed(self, types: list[str] = None) -> "TypedCollection":
         """
         Returns a dictionary of templates grouped by their template type
         """
 
+        types = set(types) if types else None
+
         templates = {}
 
         for group in self.groups:
             for template_id, template in group.templates.items():
 
-                if types and template.template_type not in types:
+                if types is not None and template.template_type not in types:
                     continue
 
-                if template.template_type not in templates:
-                    templates[template.template_type] = {}
                 uid = f"{group.uid}__{template_id}"
-                templates[template.template_type][uid] = template
+                templates.setdefault(template.template_type, {})[uid] = template
 
-        return TypedCollection(templates=templates)
+        # the templates are validated already
+        return TypedCollection.model_construct(templates=templates)
 
     def save(self, path: str = TEMPLATE_PATH):
         for group in self.groups:
             group.save(path)
 
+    async def asave(self, path: str = TEMPLATE_PATH):
+        await asyncio.gather(*[group.asave(path) for group in self.groups])
+
     def find(self, uid: str) -> Group | None:
         for group in self.groups:
             if group.uid == uid:
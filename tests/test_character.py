@@ -0,0 +1,49 @@
+import pytest
+from talemate.tale_mate import Character
+
+
+@pytest.mark.parametrize("orig_name, new_name, text, expected", [
+    ("Al", "Bob", "Al and Alice met Al.", "Bob and Alice met Bob."),
+    ("Al", "Bob", "Alice talks to Sal.", "Alice talks to Sal."),
+    ("Al", "Bob", "Al's hat, (Al)", "Bob's hat, (Bob)"),
+    ("Dr. Al", "Dr. Bob", "Dr. Al smiles.", "Dr. Bob smiles."),
+    ("Al", r"B\1b", "Al waves.", r"B\1b waves."),
+])
+def test_character_rename(orig_name, new_name, text, expected):
+    character = Character(
+        orig_name,
+        description=text,
+        base_attributes={"notes": text, "age": 30},
+        details={"history": text},
+    )
+    character.rename(new_name)
+
+    assert character.name == new_name
+    assert character.description == expected
+    assert character.base_attributes == {"notes": expected, "age": 30}
+    assert character.details == {"history": expected}
+    assert character.memory_dirty
+
+
+def test_character_rename_you():
+    character = Character("You", description="You look around.")
+    character.rename("Bob")
+
+    assert character.name == "Bob"
+    assert character.description == "You look around."
+
+
+@pytest.mark.parametrize("example_dialogue, num, expected_len", [
+    (None, 3, 0),
+    ([], 3, 0),
+    (["Bob: Hi."], 3, 1),
+    (["Bob: Hi.", "Bob: Hey.", "Bob: Yo.", "Bob: Sup."], 3, 3),
+    (["Bob: Hi."], 0, 0),
+])
+def test_character_random_dialogue_examples(example_dialogue, num, expected_len):
+    character = Character("Bob", example_dialogue=example_dialogue)
+    examples = character.random_dialogue_examples(num)
+
+    assert len(examples) == expected_len
+    assert len(set(examples)) == expected_len
+    assert all(example in (example_dialogue or []) for example in examples)
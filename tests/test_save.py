@@ -0,0 +1,49 @@
+import json
+
+from talemate.save import SceneEncoder, dumps_scene
+from talemate.scene_message import (
+    CharacterMessage,
+    DirectorMessage,
+    NarratorMessage,
+    TimePassageMessage,
+)
+
+
+def test_dumps_scene_matches_scene_encoder():
+    scene_data = {
+        "name": "Test Scene",
+        "history": [
+            CharacterMessage("Alice: Hello there.", source="player", from_choice="greet"),
+            NarratorMessage("The room is quiet.", meta={"agent": "narrator"}),
+            DirectorMessage("Alice should smile.", source="Alice"),
+            TimePassageMessage(ts="PT1H", message="1 hour later"),
+        ],
+        "archived_history": [{"text": "Earlier events.", "ts": "PT1S", "start": 0, "end": 2}],
+        "game_state": {"variables": {"count": 3, "ratio": 0.5, "flag": True, "none": None}},
+        "agent_state": {1: "int key"},
+        "description": "Ünïcödé – ✓",
+    }
+
+    expected = json.loads(json.dumps(scene_data, indent=2, cls=SceneEncoder))
+
+    assert json.loads(dumps_scene(scene_data)) == expected
+
+
+def test_dumps_scene_keeps_message_types():
+    scene_data = {
+        "history": [
+            CharacterMessage("Alice: Hello there."),
+            TimePassageMessage(ts="PT1H", message="1 hour later"),
+        ]
+    }
+
+    history = json.loads(dumps_scene(scene_data))["history"]
+
+    assert [message["typ"] for message in history] == ["character", "time"]
+    assert history[1]["ts"] == "PT1H"
+
+
+def test_dumps_scene_large_integers():
+    scene_data = {"game_state": {"variables": {"big": 2**70}}}
+
+    assert json.loads(dumps_scene(scene_data)) == scene_data
@@ -0,0 +1,62 @@
+from talemate.scene_message import CharacterMessage, DirectorMessage
+from talemate.tale_mate import Scene
+
+
+def test_message_index_follows_history_changes():
+    scene = Scene()
+    messages = [CharacterMessage(f"Bob: line {i}") for i in range(5)]
+    scene.push_history(messages)
+
+    assert scene.message_index(messages[3].id) == 3
+    assert scene.get_message(messages[3].id) is messages[3]
+
+    # the history is also modified outside of the scene
+    scene.history.pop(1)
+
+    assert scene.message_index(messages[3].id) == 2
+    assert scene.message_index(messages[1].id) == -1
+    assert scene.get_message(messages[1].id) is None
+
+    scene.history = scene.history[:2]
+
+    assert scene.message_index(messages[4].id) == -1
+    assert scene.message_index(messages[2].id) == 1
+
+
+def test_director_message_replaced_per_source():
+    scene = Scene()
+    bob = DirectorMessage("Bob should leave.", source="Bob")
+    alice = DirectorMessage("Alice should stay.", source="Alice")
+    scene.push_history([CharacterMessage("Bob: Hello."), bob, alice])
+
+    new_bob = DirectorMessage("Bob should sit down.", source="Bob")
+    scene.push_history(new_bob)
+
+    assert bob not in scene.history
+    assert alice in scene.history
+    assert scene.history[-1] is new_bob
+
+
+def test_director_message_stale_id_after_reload():
+    scene = Scene()
+    bob = DirectorMessage("Bob should leave.", source="Bob")
+    scene.push_history(bob)
+
+    # history is replaced (e.g., restore) and the old id now belongs to
+    # another character's director message
+    alice = DirectorMessage("Alice should stay.", source="Alice", id=bob.id)
+    scene.history = [alice]
+
+    scene.push_history(DirectorMessage("Bob should sit down.", source="Bob"))
+
+    assert alice in scene.history
+
+
+def test_reset_clears_message_indexes():
+    scene = Scene()
+    scene.push_history(DirectorMessage("Bob should leave.", source="Bob"))
+
+    scene.reset()
+
+    assert scene._message_index == {}
+    assert scene._director_message_ids == {}
@@ -0,0 +1,14 @@
+import pytest
+from talemate.scene_message import CharacterMessage, NarratorMessage
+
+
+@pytest.mark.parametrize("message, needle, expected", [
+    (CharacterMessage("Bob: Hello there."), "Hello", True),
+    (CharacterMessage("Bob: Hello there."), "Bob:", True),
+    (CharacterMessage("Bob: Hello there."), "Goodbye", False),
+    (NarratorMessage("The door creaks open."), "door", True),
+    # the message is not contained in a longer string
+    (NarratorMessage("door"), "The door creaks open.", False),
+])
+def test_scene_message_contains(message, needle, expected):
+    assert (needle in message) is expected